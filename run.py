@@ -7,16 +7,21 @@ FA: برای اجرای هم‌زمان بک‌اند و فرانت‌اند (uv
 
 from __future__ import annotations
 
+import importlib.util
 import os
+import signal
 import subprocess
 import sys
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 import shutil
 
 
 ROOT = Path(__file__).resolve().parent
 UI_DIR = ROOT / "ui"
+# EN: Seconds to wait for a graceful shutdown before force-killing
+# FA: مدت انتظار (ثانیه) برای خاموشی آرام پیش از کشتن اجباری
+STOP_TIMEOUT_S = 3.0
 
 
 def ensure_npm_install() -> None:
@@ -38,12 +43,55 @@ def ensure_npm_install() -> None:
     subprocess.check_call(["npm", "install"], cwd=UI_DIR)
 
 
-def start_process(cmd: List[str], cwd: Path | None = None) -> subprocess.Popen:
+def start_process(
+    cmd: List[str], cwd: Path | None = None, env: Dict[str, str] | None = None
+) -> subprocess.Popen:
     """
-    EN: Start a subprocess and return the handle.
-    FA: یک پردازش فرزند راه‌اندازی کرده و هندل آن را برمی‌گرداند.
+    EN: Start a subprocess in its own process group and return the handle.
+    FA: یک پردازش فرزند را در گروه پردازشی جداگانه راه‌اندازی کرده و هندل آن را برمی‌گرداند.
     """
-    return subprocess.Popen(cmd, cwd=cwd)
+    # EN: A separate group lets us signal reloaders/dev servers together with their children
+    # FA: گروه جداگانه امکان ارسال سیگنال به reloader/سرور توسعه همراه با فرزندانشان را می‌دهد
+    if os.name == "nt":
+        return subprocess.Popen(
+            cmd, cwd=cwd, env=env, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    return subprocess.Popen(cmd, cwd=cwd, env=env, start_new_session=True)
+
+
+def stop_process(proc: subprocess.Popen) -> None:
+    """
+    EN: Terminate a child's whole process group, force-killing it after a timeout.
+    FA: کل گروه پردازشی فرزند را خاتمه می‌دهد و پس از مهلت، به‌اجبار می‌کشد.
+    """
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            proc.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=STOP_TIMEOUT_S)
+    except subprocess.TimeoutExpired:
+        if os.name == "nt":
+            proc.kill()
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+    except ProcessLookupError:
+        # EN: Group already gone
+        # FA: گروه پردازشی قبلاً خاتمه یافته است
+        pass
+
+
+def uvicorn_server_args() -> List[str]:
+    """
+    EN: Prefer uvloop/httptools when installed (not available on Windows).
+    FA: در صورت نصب بودن، از uvloop و httptools استفاده می‌کند (در ویندوز موجود نیست).
+    """
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "auto"
+    http = "httptools" if importlib.util.find_spec("httptools") else "auto"
+    return ["--loop", loop, "--http", http, "--no-access-log"]
 
 
 def main() -> None:
@@ -53,7 +101,10 @@ def main() -> None:
 
     # EN: Start backend (uvicorn) and frontend (npm run dev)
     # FA: بک‌اند (uvicorn) و فرانت‌اند (npm run dev) را اجرا می‌کنیم
-    backend_cmd = [sys.executable, "-m", "uvicorn", "service.main:app", "--host", "0.0.0.0", "--port", "8000"]
+    backend_cmd = [
+        sys.executable, "-m", "uvicorn", "service.main:app", "--host", "0.0.0.0", "--port", "8000",
+        *uvicorn_server_args(),
+    ]
     frontend_cmd = ["npm", "run", "dev"]
 
     print("Starting backend (uvicorn)...")
@@ -62,7 +113,7 @@ def main() -> None:
     env = os.environ.copy()
     env.setdefault("VITE_API_BASE_URL", "http://localhost:8000")
     print("Starting frontend (Vite)...")
-    frontend_proc = subprocess.Popen(frontend_cmd, cwd=UI_DIR, env=env)
+    frontend_proc = start_process(frontend_cmd, cwd=UI_DIR, env=env)
 
     try:
         # EN: Wait for child processes; Ctrl+C will trigger cleanup
@@ -72,8 +123,8 @@ def main() -> None:
         print("Stopping processes...")
     finally:
         for proc in [backend_proc, frontend_proc]:
-            if proc and proc.poll() is None:
-                proc.terminate()
+            if proc:
+                stop_process(proc)
 
 
 if __name__ == "__main__":
@@ -7,12 +7,20 @@ FA: تنظیمات سرویس را با امکان override توسط محیط و
 
 from __future__ import annotations
 
+import functools
+import os
 from pathlib import Path
 from typing import Optional
 
 import yaml
 from pydantic_settings import BaseSettings
 
+# EN: Prefer the libyaml C loader when available; fall back to pure Python
+# FA: در صورت وجود از لودر C کتابخانه libyaml استفاده می‌شود، وگرنه نسخه پایتونی
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+ENV_PREFIX = "RETAIL_REC_"
+
 
 class ServiceSettings(BaseSettings):
     """
@@ -32,7 +40,29 @@ class ServiceSettings(BaseSettings):
     class Config:
         # EN: Allow overriding via env vars with RETAIL_REC_ prefix
         # FA: امکان override با متغیرهای محیطی دارای پیشوند RETAIL_REC_
-        env_prefix = "RETAIL_REC_"
+        env_prefix = ENV_PREFIX
+
+
+@functools.lru_cache(maxsize=8)
+def _load_settings_cached(
+    path_str: str, mtime_ns: Optional[int], env_items: tuple[tuple[str, str], ...]
+) -> ServiceSettings:
+    """
+    EN: Parse YAML and build settings; cached per (path, mtime, RETAIL_REC_* env) triple.
+        `env_items` is only part of the key; pydantic reads the environment itself.
+    FA: YAML را خوانده و تنظیمات را می‌سازد؛ به ازای هر سه‌تایی (مسیر، زمان تغییر، محیط RETAIL_REC_*) کش می‌شود.
+        `env_items` فقط بخشی از کلید است؛ pydantic خودش متغیرهای محیطی را می‌خواند.
+    """
+    # EN: Start with YAML values if file exists
+    # FA: اگر فایل YAML وجود داشته باشد از همان مقادیر شروع می‌کنیم
+    yaml_data = {}
+    if mtime_ns is not None:
+        with open(path_str, "r", encoding="utf-8") as f:
+            yaml_data = yaml.load(f, Loader=YamlLoader) or {}
+
+    # EN: Pydantic BaseSettings will merge defaults, YAML, and env overrides
+    # FA: Pydantic ترکیبی از پیش‌فرض، YAML و متغیر محیطی را اعمال می‌کند
+    return ServiceSettings(**yaml_data)
 
 
 def load_service_settings(config_path: Optional[Path] = None) -> ServiceSettings:
@@ -40,22 +70,17 @@ def load_service_settings(config_path: Optional[Path] = None) -> ServiceSettings
     Load settings from YAML (if present) plus environment overrides.
 
     EN: Reads configs/service.yaml when available, then applies env overrides.
+        Parsing is cached until the file or a RETAIL_REC_* variable changes; each caller gets its own copy.
     FA: در صورت وجود فایل YAML، تنظیمات را می‌خواند و سپس متغیرهای محیطی را اعمال می‌کند.
+        تجزیه تا تغییر فایل یا یکی از متغیرهای RETAIL_REC_* کش می‌شود؛ هر فراخواننده نسخه مستقل خود را می‌گیرد.
     """
     project_root = Path(__file__).resolve().parents[1]
     default_path = project_root / "configs" / "service.yaml"
     path = config_path or default_path
-
-    # EN: Start with YAML values if file exists
-    # FA: اگر فایل YAML وجود داشته باشد از همان مقادیر شروع می‌کنیم
-    yaml_data = {}
-    if path.exists():
-        with path.open("r", encoding="utf-8") as f:
-            yaml_data = yaml.safe_load(f) or {}
-
-    # EN: Pydantic BaseSettings will merge defaults, YAML, and env overrides
-    # FA: Pydantic ترکیبی از پیش‌فرض، YAML و متغیر محیطی را اعمال می‌کند
-    return ServiceSettings(**yaml_data)
+    mtime_ns = path.stat().st_mtime_ns if path.exists() else None
+    # EN/FA: متغیرهای محیطی بدون حساسیت به حروف خوانده می‌شوند، پس مقایسه با حروف بزرگ انجام می‌شود
+    env_items = tuple(sorted((k, v) for k, v in os.environ.items() if k.upper().startswith(ENV_PREFIX)))
+    return _load_settings_cached(str(path), mtime_ns, env_items).model_copy(deep=True)
 
 
 __all__ = ["ServiceSettings", "load_service_settings"]
@@ -7,13 +7,24 @@ FA: مدل‌ها را در شروع بارگذاری کرده و API توصیه
 
 from __future__ import annotations
 
-import json
+import asyncio
+import functools
+import gc
+import importlib.util
 import logging
+import logging.handlers
 import os
+import queue
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+import orjson
 import pandas as pd
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
@@ -25,7 +36,7 @@ from src.models.baseline import PopularityRecommender
 from src.models.collaborative import CollaborativeRecommender
 from src.models.content_based import ContentBasedRecommender
 from src.models.hybrid import HybridRecommender
-from src.utils.io import ensure_dir, load_pickle
+from src.utils.io import ensure_dir, load_id_mapping
 from service.config import ServiceSettings, load_service_settings
 from service.schemas import (
     HealthResponse,
@@ -36,22 +47,128 @@ from service.schemas import (
     SimilarItemsResponse,
 )
 
+# EN: Values made only of digits, dots, and dashes are treated as numeric noise
+# FA: مقادیری که فقط از رقم، نقطه و خط تیره تشکیل شده‌اند نویز عددی در نظر گرفته می‌شوند
+NUMERIC_VALUE_RE = re.compile(r"[\d.\-]*\d[\d.\-]*")
+
 # EN: Configure logger to JSON lines file
 # FA: پیکربندی لاگر برای نوشتن به فایل JSONL
 logger = logging.getLogger("api")
 logger.setLevel(logging.INFO)
 
 
-def setup_logger(log_dir: Path) -> None:
+# EN: Flush thresholds for batched JSONL writes
+# FA: آستانه‌های تخلیه بافر برای نوشتن دسته‌ای JSONL
+LOG_FLUSH_BYTES = 64 * 1024
+LOG_FLUSH_INTERVAL_S = 0.01
+
+
+class BatchedFileHandler(logging.Handler):
     """
-    EN: Initialize logger with JSONL file handler.
-    FA: لاگر را با فایل JSONL مقداردهی اولیه می‌کنیم.
+    EN: Appends formatted records to an in-memory buffer and writes it in batches.
+    FA: رکوردهای قالب‌بندی‌شده را در بافر حافظه جمع کرده و به‌صورت دسته‌ای می‌نویسد.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        flush_bytes: int = LOG_FLUSH_BYTES,
+        flush_interval: float = LOG_FLUSH_INTERVAL_S,
+    ) -> None:
+        super().__init__()
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        # EN: Unbuffered binary file; buffering is managed explicitly below
+        # FA: فایل باینری بدون بافر؛ بافر به‌صورت صریح در ادامه مدیریت می‌شود
+        self._file = open(path, "ab", buffering=0)
+        self._buffer = bytearray()
+        self._last_flush = time.monotonic()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buffer += self.format(record).encode("utf-8")
+            self._buffer += b"\n"
+            if (
+                len(self._buffer) >= self.flush_bytes
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            written = 0
+            with memoryview(self._buffer) as view:
+                while written < len(view):
+                    written += self._file.write(view[written:])
+            self._buffer.clear()
+            self._last_flush = time.monotonic()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            if not self._file.closed:
+                self.flush()
+                self._file.close()
+        finally:
+            self.release()
+        super().close()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    EN: Queue listener that flushes its handlers whenever the queue goes idle.
+    FA: شنونده صف که هنگام خالی ماندن صف، هندلرها را تخلیه می‌کند.
+    """
+
+    def start(self) -> None:
+        """
+        EN: Start the writer thread unless it is already running (safe across repeated app startups).
+        FA: نخ نویسنده را در صورت اجرا نبودن راه‌اندازی می‌کند (در راه‌اندازی‌های مکرر برنامه امن است).
+        """
+        if self._thread is None:
+            super().start()
+
+    def stop(self) -> None:
+        """
+        EN: Drain the queue and stop the writer thread; a no-op when it is not running.
+        FA: صف را تخلیه و نخ نویسنده را متوقف می‌کند؛ اگر در حال اجرا نباشد کاری انجام نمی‌دهد.
+        """
+        if self._thread is not None:
+            super().stop()
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        try:
+            return self.queue.get(block=block, timeout=LOG_FLUSH_INTERVAL_S)
+        except queue.Empty:
+            # EN: No new records for a while; push buffered lines to disk before blocking
+            # FA: مدتی رکورد جدیدی نیامده؛ پیش از انتظار، خطوط بافرشده روی دیسک نوشته می‌شوند
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block=block)
+
+
+def setup_logger(log_dir: Path) -> logging.handlers.QueueListener:
+    """
+    EN: Initialize logger with a queue-backed, batched JSONL file handler; the app's startup hook starts
+        the returned listener and shutdown stops it, so each startup gets a running writer.
+    FA: لاگر را با هندلر فایل JSONL دسته‌ای و مبتنی بر صف مقداردهی اولیه می‌کنیم؛ رویداد startup برنامه
+        شنونده برگشتی را راه‌اندازی و shutdown آن را متوقف می‌کند تا هر راه‌اندازی نویسنده فعال داشته باشد.
     """
     ensure_dir(log_dir)
-    fh = logging.FileHandler(log_dir / "api_requests.jsonl", encoding="utf-8")
+    fh = BatchedFileHandler(log_dir / "api_requests.jsonl")
     fmt = logging.Formatter("%(message)s")
     fh.setFormatter(fmt)
-    logger.addHandler(fh)
+    # EN: Request handlers only enqueue records; a background thread writes to disk
+    # FA: هندلرهای درخواست فقط رکورد را در صف می‌گذارند و یک نخ پس‌زمینه روی دیسک می‌نویسد
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    listener = BatchingQueueListener(q, fh, respect_handler_level=True)
+    logger.addHandler(logging.handlers.QueueHandler(q))
+    return listener
 
 
 def log_recommendation_request(
@@ -73,10 +190,10 @@ def log_recommendation_request(
         "top_k": top_k,
         "returned": num_returned,
         "path": path,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.utcnow(),  # EN/FA: orjson به‌صورت ISO-8601 سریال می‌کند
         "status_code": status_code,
     }
-    logger.info(json.dumps(log_line, ensure_ascii=False))
+    logger.info(orjson.dumps(log_line).decode())
 
 
 def log_similarity_request(
@@ -96,10 +213,10 @@ def log_similarity_request(
         "top_k": top_k,
         "returned": num_returned,
         "path": path,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.utcnow(),  # EN/FA: orjson به‌صورت ISO-8601 سریال می‌کند
         "status_code": status_code,
     }
-    logger.info(json.dumps(log_line, ensure_ascii=False))
+    logger.info(orjson.dumps(log_line).decode())
 
 
 class ModelRegistry:
@@ -113,10 +230,14 @@ class ModelRegistry:
         self.user_mapping: Dict[str, int] = {}
         self.item_mapping: Dict[str, int] = {}
         self.item_props: pd.DataFrame = pd.DataFrame()
+        self._item_meta: Dict[str, Tuple[str, Optional[List[Dict[str, str]]]]] = {}
         self.pop_model: PopularityRecommender | None = None
         self.cf_model: CollaborativeRecommender | None = None
         self.content_model: ContentBasedRecommender | None = None
         self.hybrid_model: HybridRecommender | None = None
+        # EN: Metadata is immutable per item for the process lifetime, so memoize it
+        # FA: فراداده هر کالا در طول عمر پردازش ثابت است، پس آن را کش می‌کنیم
+        self._cached_item_metadata = functools.lru_cache(maxsize=100_000)(self._build_item_metadata)
         self._load_artifacts()
 
     def _load_artifacts(self) -> None:
@@ -127,37 +248,58 @@ class ModelRegistry:
         processed = self.settings.processed_dir
         models_dir = self.settings.models_dir
         fast_mode = os.getenv("FAST_TEST", "0") == "1"
-        self.user_mapping = load_pickle(processed / "user_mapping.pkl")
-        self.item_mapping = load_pickle(processed / "item_mapping.pkl")
-        self.item_props = pd.read_parquet(processed / "item_properties_clean.parquet")
+        cf_path = models_dir / "cf_model.npz"
+        content_features = models_dir / "content_features.npz"
+        content_vec = models_dir / "tfidf_vectorizer.pkl"
 
-        # EN: Fit popularity model from train interactions if available; else from events
-        # FA: مدل محبوبیت را از داده آموزش (در صورت وجود) یا events می‌سازیم
-        train_path = processed / "train_interactions.parquet"
-        if train_path.exists():
-            train_df = pd.read_parquet(train_path)
-        else:
-            events = pd.read_parquet(processed / "events_clean.parquet")
-            # EN: Apply implicit weights for popularity when train split is absent
-            # FA: در صورت نبود برش آموزش، وزن رویدادها را برای محبوبیت اعمال می‌کنیم
-            events = events[events["event"].isin(EVENT_WEIGHTS.keys())].copy()
-            events["score"] = events["event"].map(EVENT_WEIGHTS)
-            train_df = events[["visitorid", "itemid", "score"]].copy()
-        self.pop_model = PopularityRecommender().fit(train_df)
-
-        # EN: Load interaction matrix for CF/Hybrid
-        # FA: ماتریس تعاملات برای CF/Hybrid بارگذاری می‌شود
-        interactions = sparse.load_npz(processed / "user_item_interactions.npz").tocsr()
+        # EN: Independent artifact loads run concurrently; fit-if-missing steps stay serial below
+        # FA: بارگذاری آرتیفکت‌های مستقل به‌صورت هم‌زمان انجام می‌شود؛ آموزش در صورت نبود، در ادامه سریالی است
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="artifact-load") as ex:
+            futures = {
+                "user_mapping": ex.submit(load_id_mapping, processed, "user"),
+                "item_mapping": ex.submit(load_id_mapping, processed, "item"),
+                # EN: Read only the columns we use, Arrow-backed to avoid per-string object overhead
+                # FA: فقط ستون‌های مورد نیاز با پشتیبانی Arrow خوانده می‌شوند تا سربار رشته‌های پایتونی حذف شود
+                "item_props": ex.submit(
+                    pd.read_parquet,
+                    processed / "item_properties_clean.parquet",
+                    columns=["itemid", "property", "value"],
+                    dtype_backend="pyarrow",
+                ),
+                "train_df": ex.submit(self._load_popularity_frame, processed),
+                "interactions": ex.submit(sparse.load_npz, processed / "user_item_interactions.npz"),
+            }
+            if cf_path.exists():
+                futures["cf_model"] = ex.submit(CollaborativeRecommender.load, cf_path)
+            if content_features.exists() and content_vec.exists():
+                futures["content_model"] = ex.submit(
+                    ContentBasedRecommender.load, content_features, content_vec
+                )
+            loaded = {name: fut.result() for name, fut in futures.items()}
+
+        self.user_mapping = self._intern_mapping(loaded["user_mapping"])
+        self.item_mapping = self._intern_mapping(loaded["item_mapping"])
+        self.item_props = loaded.pop("item_props")
+        self._item_meta = self._build_item_meta_index(self.item_props)
+        self.pop_model = PopularityRecommender().fit(loaded.pop("train_df"))
+
+        # EN: Interaction matrix for CF/Hybrid
+        # FA: ماتریس تعاملات برای CF/Hybrid
+        interactions = loaded.pop("interactions").tocsr()
         if fast_mode:
             # EN: Subsample for faster unit tests
             # FA: برای تست سریع، زیرنمونه کوچک استفاده می‌کنیم
             interactions = interactions[:500, :800]
-
-        # EN: Try to load CF model if artifact exists, otherwise fit
-        # FA: اگر آرتیفکت CF موجود باشد بارگذاری، وگرنه آموزش می‌دهیم
-        cf_path = models_dir / "cf_model.npz"
-        if cf_path.exists():
-            self.cf_model = CollaborativeRecommender.load(cf_path)
+        # EN: int32 index arrays halve index memory when the matrix fits
+        # FA: در صورت امکان، آرایه‌های اندیس int32 حافظه اندیس را نصف می‌کنند
+        if max(interactions.nnz, *interactions.shape) <= np.iinfo(np.int32).max:
+            interactions.indices = interactions.indices.astype(np.int32, copy=False)
+            interactions.indptr = interactions.indptr.astype(np.int32, copy=False)
+
+        # EN: Use the loaded CF model if the artifact existed, otherwise fit
+        # FA: اگر آرتیفکت CF موجود بود از آن استفاده، وگرنه آموزش می‌دهیم
+        if "cf_model" in loaded:
+            self.cf_model = loaded["cf_model"]
         else:
             ensure_dir(models_dir)
             self.cf_model = CollaborativeRecommender().fit(
@@ -165,12 +307,10 @@ class ModelRegistry:
             )
             self.cf_model.save(cf_path)
 
-        # EN: Try to load content model artifacts if available
-        # FA: اگر آرتیفکت مدل محتوایی موجود باشد آن را بارگذاری می‌کنیم
-        content_features = models_dir / "content_features.npz"
-        content_vec = models_dir / "tfidf_vectorizer.pkl"
-        if content_features.exists() and content_vec.exists():
-            self.content_model = ContentBasedRecommender.load(content_features, content_vec)
+        # EN: Use the loaded content model if artifacts existed, otherwise fit
+        # FA: اگر آرتیفکت مدل محتوایی موجود بود از آن استفاده، وگرنه آموزش می‌دهیم
+        if "content_model" in loaded:
+            self.content_model = loaded["content_model"]
         else:
             ensure_dir(models_dir)
             content_df = self.item_props
@@ -180,6 +320,12 @@ class ModelRegistry:
                 content_df = content_df.head(50000)
             self.content_model = ContentBasedRecommender().fit(content_df)
             self.content_model.save(content_features, content_vec)
+            del content_df
+
+        # EN: Raw property rows are only needed for the metadata index and content fit; release them
+        # FA: ردیف‌های خام ویژگی فقط برای نمایه فراداده و آموزش محتوایی لازم‌اند؛ آزادشان می‌کنیم
+        self.item_props = pd.DataFrame()
+        gc.collect()
 
         # EN: Build hybrid model using trained CF and content models
         # FA: مدل هایبرید را با CF و محتوایی ساخته‌شده می‌سازیم
@@ -191,6 +337,9 @@ class ModelRegistry:
             user_mapping=self.user_mapping,
             item_mapping=self.item_mapping,
         )
+        # EN: The hybrid (and CF) models hold the only reference to the CSR matrix
+        # FA: مدل هایبرید (و CF) تنها ارجاع به ماتریس CSR را نگه می‌دارند
+        del interactions
 
     def recommend(self, user_id: str, model_name: str, top_k: int) -> List[Tuple[str, float]]:
         """
@@ -220,45 +369,136 @@ class ModelRegistry:
             raise RuntimeError("Content model not available.")
         return self.content_model.similar_items(item_id, top_k=top_k)
 
+    @staticmethod
+    def _load_popularity_frame(processed: Path) -> pd.DataFrame:
+        """
+        EN: Load (visitorid, itemid, score) rows from the train split, else from weighted events.
+        FA: ردیف‌های (کاربر، کالا، امتیاز) را از برش آموزش یا در نبود آن از رویدادهای وزن‌دار می‌خواند.
+        """
+        train_path = processed / "train_interactions.parquet"
+        if train_path.exists():
+            return pd.read_parquet(
+                train_path, columns=["visitorid", "itemid", "score"], dtype_backend="pyarrow"
+            )
+        events = pd.read_parquet(
+            processed / "events_clean.parquet",
+            columns=["visitorid", "itemid", "event"],
+            dtype_backend="pyarrow",
+        )
+        # EN: Encode event type against the known weights in one pass; unknown types get code -1
+        # FA: نوع رویداد در یک گذر نسبت به وزن‌های شناخته‌شده کدگذاری می‌شود؛ انواع ناشناخته کد -1 می‌گیرند
+        codes = pd.Categorical(events["event"], categories=list(EVENT_WEIGHTS)).codes
+        known = codes >= 0
+        weights = np.fromiter(EVENT_WEIGHTS.values(), dtype=np.float64, count=len(EVENT_WEIGHTS))
+        # EN: Apply implicit weights for popularity when train split is absent
+        # FA: در صورت نبود برش آموزش، وزن رویدادها را برای محبوبیت اعمال می‌کنیم
+        train_df = events.loc[known, ["visitorid", "itemid"]].copy()
+        train_df["score"] = weights[codes[known]]
+        return train_df
+
+    @staticmethod
+    def _intern_mapping(raw: Dict) -> Dict[str, int]:
+        """
+        EN: Normalize mapping keys to interned plain str for fast per-request membership tests.
+        FA: کلیدهای نگاشت را به رشته ساده interned تبدیل می‌کند تا بررسی عضویت در هر درخواست سریع باشد.
+        """
+        return {sys.intern(str(k)): int(v) for k, v in raw.items()}
+
+    @staticmethod
+    def _build_item_meta_index(
+        item_props: pd.DataFrame,
+    ) -> Dict[str, Tuple[str, Optional[List[Dict[str, str]]]]]:
+        """
+        EN: Precompute item_id -> (category, attributes) once so requests never touch pandas.
+        FA: نگاشت شناسه کالا به (دسته، ویژگی‌ها) را یک‌بار پیش‌محاسبه می‌کند تا درخواست‌ها به پانداس نیاز نداشته باشند.
+        """
+        if item_props.empty or not {"itemid", "property", "value"} <= set(item_props.columns):
+            return {}
+        # EN: Arrow-backed columns keep nulls as float NaN under astype(str); spell them "nan" as before
+        # FA: ستون‌های Arrow با astype(str) مقدار null را NaN اعشاری نگه می‌دارند؛ مانند قبل به "nan" تبدیل می‌شوند
+        props = item_props["property"].astype("string").fillna("nan")
+        vals = item_props["value"].astype("string").fillna("nan")
+        # EN: Precompute per-row flags with vectorized string ops instead of per-row Python checks
+        # FA: پرچم‌های هر ردیف با عملیات برداری رشته پیش‌محاسبه می‌شوند
+        is_category = props.str.lower().str.contains("category", regex=False)
+        looks_numeric = vals.str.fullmatch(NUMERIC_VALUE_RE)
+        is_noisy = (vals.str.len() > 40) | looks_numeric
+
+        first_value: Dict[str, str] = {}
+        categories: Dict[str, str] = {}
+        attributes: Dict[str, List[Dict[str, str]]] = {}
+        for iid, prop, val, cat_flag, noisy_flag in zip(
+            item_props["itemid"].astype(str).to_numpy(),
+            props.to_numpy(),
+            vals.to_numpy(),
+            is_category.to_numpy(),
+            is_noisy.to_numpy(),
+        ):
+            item_attrs = attributes.get(iid)
+            if item_attrs is None:
+                first_value[iid] = val
+                item_attrs = attributes[iid] = []
+            # EN: Stop scanning an item once two attributes are collected
+            # FA: پس از جمع‌آوری دو ویژگی، بررسی ردیف‌های آن کالا متوقف می‌شود
+            if len(item_attrs) >= 2:
+                continue
+            # EN: Prefer explicit category fields
+            # FA: فیلدهای دسته‌بندی صریح را در اولویت قرار می‌دهیم
+            if cat_flag and iid not in categories:
+                categories[iid] = val
+                continue
+            # EN: Skip noisy long or purely numeric values
+            # FA: مقادیر بسیار طولانی یا تماماً عددی حذف می‌شوند
+            if noisy_flag:
+                continue
+            item_attrs.append({"name": prop, "value": val})
+
+        # EN: Fallback category is the item's first property value
+        # FA: در صورت نبود دسته صریح، اولین مقدار به عنوان دسته قرار می‌گیرد
+        return {
+            iid: (categories.get(iid, first), attributes[iid] or None)
+            for iid, first in first_value.items()
+        }
+
     def item_metadata(self, item_id: str) -> ItemMetadata:
         """
-        EN: Fetch metadata for a single item from item properties.
-        FA: فراداده یک کالا را از ویژگی‌های آیتم استخراج می‌کند.
+        EN: Fetch cached metadata for a single item (shared instance; do not mutate).
+        FA: فراداده کش‌شده یک کالا را برمی‌گرداند (نمونه مشترک است؛ تغییر ندهید).
         """
-        if self.item_props.empty:
+        return self._cached_item_metadata(item_id)
+
+    def scored_items(self, scored: List[Tuple[str, float]]) -> List[ItemMetadata]:
+        """
+        EN: Build response items from (item_id, score) pairs without re-running validation.
+        FA: اقلام پاسخ را از جفت‌های (شناسه، امتیاز) بدون اعتبارسنجی مجدد می‌سازد.
+        """
+        # EN: Fields come from the prebuilt index, so Pydantic validation can be skipped
+        # FA: فیلدها از نمایه ازپیش‌ساخته می‌آیند، پس می‌توان اعتبارسنجی Pydantic را رد کرد
+        item_meta = self._item_meta
+        items = []
+        for item_id, score in scored:
+            category, attributes = item_meta.get(item_id, (None, None))
+            items.append(
+                ItemMetadata.model_construct(
+                    item_id=item_id, category=category, attributes=attributes, score=score
+                )
+            )
+        return items
+
+    def _build_item_metadata(self, item_id: str) -> ItemMetadata:
+        """
+        EN: Build metadata for a single item from the precomputed index.
+        FA: فراداده یک کالا را از نمایه پیش‌محاسبه‌شده می‌سازد.
+        """
+        meta = self._item_meta.get(item_id)
+        if meta is None:
             return ItemMetadata(item_id=item_id)
-        rows = self.item_props[self.item_props["itemid"] == item_id]
-        category = None
-        attributes = []
-        if not rows.empty and "property" in rows.columns and "value" in rows.columns:
-            def looks_numeric(text: str) -> bool:
-                return text.replace(".", "").replace("-", "").isdigit()
-
-            for _, r in rows.iterrows():
-                prop = str(r["property"])
-                val = str(r["value"])
-                # EN: Prefer explicit category fields
-                # FA: فیلدهای دسته‌بندی صریح را در اولویت قرار می‌دهیم
-                if category is None and "category" in prop.lower():
-                    category = val
-                    continue
-                # EN: Skip noisy long or purely numeric values
-                # FA: مقادیر بسیار طولانی یا تماماً عددی حذف می‌شوند
-                if len(val) > 40 or looks_numeric(val):
-                    continue
-                attributes.append({"name": prop, "value": val[:40]})
-                if len(attributes) >= 2:
-                    break
-
-            # EN: Fallback category from first row if none found
-            # FA: در صورت نبود دسته صریح، اولین مقدار به عنوان دسته قرار می‌گیرد
-            if category is None and not rows.empty:
-                category = str(rows.iloc[0]["value"])
-        return ItemMetadata(item_id=item_id, category=category, attributes=attributes or None)
+        category, attributes = meta
+        return ItemMetadata(item_id=item_id, category=category, attributes=attributes)
 
 
 settings = load_service_settings()
-setup_logger(settings.project_root / "logs")
+log_listener = setup_logger(settings.project_root / "logs")
 app = FastAPI(title="Hybrid Retail Recommender API")
 
 # EN: Enable CORS for allowed origins
@@ -278,9 +518,28 @@ async def startup_event() -> None:
     EN: Load models and metadata once at service startup.
     FA: بارگذاری مدل‌ها و فراداده در هنگام راه‌اندازی سرویس.
     """
+    # EN: Size the default executor used by asyncio.to_thread for model inference
+    # FA: اندازه اجراکننده پیش‌فرض asyncio.to_thread برای استنتاج مدل تعیین می‌شود
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="inference")
+    )
+    # EN: (Re)start the log writer; a previous shutdown in this process may have stopped it
+    # FA: نویسنده لاگ (دوباره) راه‌اندازی می‌شود؛ ممکن است shutdown قبلی در همین فرایند آن را متوقف کرده باشد
+    log_listener.start()
     app.state.registry = ModelRegistry(settings)
 
 
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """
+    EN: Flush queued log records to disk on shutdown.
+    FA: هنگام خاموش شدن، رکوردهای لاگ در صف روی دیسک نوشته می‌شوند.
+    """
+    log_listener.stop()
+    for handler in log_listener.handlers:
+        handler.flush()
+
+
 @app.get("/health", response_model=HealthResponse)
 async def health() -> HealthResponse:
     """
@@ -310,17 +569,15 @@ async def recommend(req: RecommendationRequest, request: Request) -> Recommendat
         raise HTTPException(status_code=404, detail="User not found / کاربر یافت نشد.")
 
     try:
-        recs = registry.recommend(req.user_id, model_name, top_k)
+        # EN: Run CPU-bound scoring off the event loop so concurrent requests are not serialized
+        # FA: امتیازدهی سنگین خارج از حلقه رویداد اجرا می‌شود تا درخواست‌های هم‌زمان سریالی نشوند
+        recs = await asyncio.to_thread(registry.recommend, req.user_id, model_name, top_k)
     except ValueError:
         raise HTTPException(status_code=404, detail="User not found / کاربر یافت نشد.")
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    items = []
-    for item_id, score in recs:
-        meta = registry.item_metadata(item_id)
-        meta.score = score
-        items.append(meta)
+    items = registry.scored_items(recs)
 
     log_recommendation_request(
         user_id=req.user_id,
@@ -348,17 +605,13 @@ async def similar_items(req: SimilarItemsRequest, request: Request) -> SimilarIt
         raise HTTPException(status_code=404, detail="Item not found / کالا یافت نشد.")
 
     try:
-        sims = registry.similar_items(req.item_id, req.top_k)
+        sims = await asyncio.to_thread(registry.similar_items, req.item_id, req.top_k)
     except ValueError:
         raise HTTPException(status_code=404, detail="Item not found / کالا یافت نشد.")
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    items = []
-    for item_id, score in sims:
-        meta = registry.item_metadata(item_id)
-        meta.score = score
-        items.append(meta)
+    items = registry.scored_items(sims)
 
     log_similarity_request(
         item_id=req.item_id,
@@ -382,4 +635,13 @@ async def get_item(item_id: str) -> ItemMetadata:
 
 
 if __name__ == "__main__":
-    uvicorn.run("service.main:app", host=settings.api_host, port=settings.api_port, reload=True)
+    # EN: uvloop/httptools are faster but not available on every platform (e.g. Windows)
+    # FA: uvloop و httptools سریع‌ترند اما روی همه پلتفرم‌ها (مثلاً ویندوز) موجود نیستند
+    uvicorn.run(
+        "service.main:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        reload=True,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "auto",
+        http="httptools" if importlib.util.find_spec("httptools") else "auto",
+    )
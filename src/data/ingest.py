@@ -8,6 +8,10 @@ FA: بارگذاری فایل‌های CSV خام، استانداردسازی 
 from pathlib import Path
 from typing import List
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 
 from src.utils.io import ensure_dir
 
@@ -17,6 +21,16 @@ EVENTS_FILE = "events.csv"
 CATEGORY_TREE_FILE = "category_tree.csv"
 ITEM_PROPERTIES_PATTERN = "item_properties_*.csv"
 
+# EN: Parquet writer settings: zstd compression, large row groups, dictionary-encoded strings
+# FA: تنظیمات نوشتن Parquet: فشرده‌سازی zstd، گروه‌های ردیف بزرگ و رمزگذاری دیکشنری رشته‌ها
+PARQUET_WRITE_OPTIONS = {
+    "engine": "pyarrow",
+    "compression": "zstd",
+    "compression_level": 3,
+    "row_group_size": 1_000_000,
+    "use_dictionary": True,
+}
+
 
 def _resolve_dataset_dir() -> Path:
     """
@@ -57,32 +71,75 @@ def load_raw_events(dataset_dir: Path) -> pd.DataFrame:
     return df
 
 
+def _read_item_properties_part(path: Path) -> pa.Table:
+    """
+    Read one item_properties part as an Arrow table.
+
+    EN: Uses pyarrow's multi-threaded CSV reader and normalizes the timestamp column.
+    FA: یک بخش item_properties را با خواننده چندنخی pyarrow خوانده و ستون زمان را نرمال می‌کند.
+    """
+    # EN: Keep identifiers and free-text columns as strings (no type inference per block); empty fields
+    #     read as null, as pandas reads them as NaN, so missing-ID filters still see them
+    # FA: شناسه‌ها و ستون‌های متنی به صورت رشته خوانده می‌شوند (بدون حدس نوع در هر بلاک)؛ فیلدهای خالی
+    #     مانند NaN در پانداس null خوانده می‌شوند تا فیلتر شناسه‌های مفقود آن‌ها را ببیند
+    convert_options = pacsv.ConvertOptions(
+        column_types={col: pa.string() for col in ["itemid", "categoryid", "property", "value"]},
+        strings_can_be_null=True,
+    )
+    read_options = pacsv.ReadOptions(use_threads=True)
+    table = pacsv.read_csv(path, read_options=read_options, convert_options=convert_options)
+    # EN: Normalize timestamp (UNIX seconds) to datetime on the Arrow column
+    # FA: ستون زمان (ثانیه یونیکس) را روی ستون Arrow به datetime تبدیل می‌کنیم
+    if "timestamp" in table.column_names:
+        idx = table.column_names.index("timestamp")
+        table = table.set_column(idx, "timestamp", pc.cast(table["timestamp"], pa.timestamp("s")))
+    return table
+
+
 def load_raw_item_properties(dataset_dir: Path) -> pd.DataFrame:
     """
     Load and concatenate all item_properties parts.
 
-    EN: Aggregates multiple part files into one DataFrame.
-    FA: چند فایل تکه‌ای item_properties را در یک دیتافریم ادغام می‌کند.
+    EN: Concatenates part files as Arrow tables and converts to pandas once.
+    FA: فایل‌های تکه‌ای item_properties را به صورت جدول Arrow ادغام کرده و یک‌بار تبدیل می‌کند.
     """
     paths: List[Path] = sorted(dataset_dir.glob(ITEM_PROPERTIES_PATTERN))
-    frames = []
-    for path in paths:
-        # EN: Read each part and append
-        # FA: هر بخش را می‌خوانیم و به لیست اضافه می‌کنیم
-        frames.append(pd.read_csv(path))
-    if not frames:
+    if not paths:
         return pd.DataFrame()
-    df = pd.concat(frames, ignore_index=True)
-    # EN: Normalize timestamp to datetime
-    # FA: ستون زمان را به datetime تبدیل می‌کنیم
-    if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s", errors="coerce")
-    # EN: Cast identifier columns to string
-    # FA: ستون‌های شناسه را به رشته تبدیل می‌کنیم
-    for col in ["itemid", "categoryid"]:
-        if col in df.columns:
-            df[col] = df[col].astype("string")
-    return df
+    table = pa.concat_tables([_read_item_properties_part(path) for path in paths])
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def write_item_properties_parquet(dataset_dir: Path, out_path: Path) -> int:
+    """
+    Stream item_properties parts into a single cleaned Parquet file.
+
+    EN: Writes part by part so only one part is in memory; returns rows written.
+    FA: بخش به بخش می‌نویسد تا فقط یک بخش در حافظه باشد؛ تعداد ردیف‌های نوشته‌شده را برمی‌گرداند.
+    """
+    paths: List[Path] = sorted(dataset_dir.glob(ITEM_PROPERTIES_PATTERN))
+    writer: pq.ParquetWriter | None = None
+    num_rows = 0
+    try:
+        for path in paths:
+            table = _read_item_properties_part(path)
+            # EN: Drop rows with missing item IDs before writing (blank fields were read as null)
+            # FA: ردیف‌های بدون شناسه کالا پیش از نوشتن حذف می‌شوند (فیلدهای خالی null خوانده شده‌اند)
+            table = table.filter(pc.is_valid(table["itemid"]))
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    out_path,
+                    table.schema,
+                    compression=PARQUET_WRITE_OPTIONS["compression"],
+                    compression_level=PARQUET_WRITE_OPTIONS["compression_level"],
+                    use_dictionary=PARQUET_WRITE_OPTIONS["use_dictionary"],
+                )
+            writer.write_table(table, row_group_size=PARQUET_WRITE_OPTIONS["row_group_size"])
+            num_rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return num_rows
 
 
 def load_raw_category_tree(dataset_dir: Path) -> pd.DataFrame:
@@ -101,11 +158,11 @@ def load_raw_category_tree(dataset_dir: Path) -> pd.DataFrame:
     return df
 
 
-def _print_basic_stats(df: pd.DataFrame, name: str) -> None:
-    """Print quick stats for a dataframe."""
+def _print_basic_stats(df: pd.DataFrame, name: str, num_rows: int | None = None) -> None:
+    """Print quick stats for a dataframe (or a head sample plus a known row count)."""
     # EN: Display row count and a sample
     # FA: تعداد ردیف‌ها و نمونه‌ای کوچک را چاپ می‌کنیم
-    print(f"{name}: {len(df):,} rows")
+    print(f"{name}: {len(df) if num_rows is None else num_rows:,} rows")
     print(df.head(3))
     print("-" * 40)
 
@@ -133,18 +190,20 @@ def ingest_all(dataset_dir: Path | None = None, processed_dir: Path | None = Non
     # EN: Load each dataset
     # FA: هر دیتاست را بارگذاری می‌کنیم
     events_df = load_raw_events(dataset_dir)
-    item_props_df = load_raw_item_properties(dataset_dir)
     category_df = load_raw_category_tree(dataset_dir)
 
     # EN: Drop rows with missing critical IDs
     # FA: ردیف‌هایی با شناسه‌های ضروری مفقود را حذف می‌کنیم
     events_df = events_df.dropna(subset=["visitorid", "itemid"])
-    item_props_df = item_props_df.dropna(subset=["itemid"])
+
+    # EN: Arrow-backed strings for IDs and a categorical for the low-cardinality event type
+    # FA: شناسه‌ها به صورت رشته Arrow و نوع رویداد کم‌تنوع به صورت دسته‌ای نگهداری می‌شوند
+    events_df = events_df.convert_dtypes(dtype_backend="pyarrow")
+    events_df["event"] = events_df["event"].astype("category")
 
     # EN: Print basic stats for sanity check
     # FA: آمار اولیه برای اطمینان از صحت داده
     _print_basic_stats(events_df, "Events")
-    _print_basic_stats(item_props_df, "Item Properties")
     _print_basic_stats(category_df, "Category Tree")
 
     # EN: Save cleaned versions to Parquet for efficiency
@@ -153,9 +212,16 @@ def ingest_all(dataset_dir: Path | None = None, processed_dir: Path | None = Non
     item_props_path = processed_dir / "item_properties_clean.parquet"
     category_path = processed_dir / "category_tree_clean.parquet"
 
-    events_df.to_parquet(events_path, index=False)
-    item_props_df.to_parquet(item_props_path, index=False)
-    category_df.to_parquet(category_path, index=False)
+    events_df.to_parquet(events_path, index=False, **PARQUET_WRITE_OPTIONS)
+    category_df.to_parquet(category_path, index=False, **PARQUET_WRITE_OPTIONS)
+
+    # EN: Item properties are the largest input; stream them part by part instead of concatenating
+    # FA: ویژگی‌های اقلام بزرگ‌ترین ورودی‌اند؛ به‌جای ادغام، بخش به بخش نوشته می‌شوند
+    item_props_rows = write_item_properties_parquet(dataset_dir, item_props_path)
+    if item_props_path.exists():
+        head = next(pq.ParquetFile(item_props_path).iter_batches(batch_size=3), None)
+        head_df = head.to_pandas() if head is not None else pd.DataFrame()
+        _print_basic_stats(head_df, "Item Properties", num_rows=item_props_rows)
 
     print("Ingestion completed.")
     print(f"Events saved to: {events_path}")
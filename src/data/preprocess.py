@@ -10,9 +10,12 @@ from typing import Dict, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from scipy import sparse
 
-from src.utils.io import ensure_dir, save_pickle
+from src.utils.io import ensure_dir, save_id_array, save_json
 
 # EN: Event weights reflecting implicit feedback strength
 # FA: وزن رویدادها که شدت بازخورد ضمنی را نشان می‌دهد
@@ -27,40 +30,52 @@ EVENT_WEIGHTS: Dict[str, float] = {
 MIN_USER_EVENTS = 5
 MIN_ITEM_EVENTS = 5
 
+# EN: Event columns used downstream; Parquet projection skips the rest (e.g. transactionid)
+# FA: ستون‌های رویداد مورد استفاده؛ پروجکشن Parquet بقیه ستون‌ها (مثل transactionid) را نمی‌خواند
+EVENT_COLUMNS = ["visitorid", "itemid", "event", "timestamp"]
 
-def load_clean_events(processed_dir: Path) -> pd.DataFrame:
-    """
-    Load cleaned events parquet.
 
-    EN: Reads the already-cleaned events file.
-    FA: فایل رویداد پاکسازی شده را می‌خواند.
+def aggregate_event_weights(events_path: Path) -> pd.DataFrame:
     """
-    events_path = processed_dir / "events_clean.parquet"
-    df = pd.read_parquet(events_path)
-    return df
-
+    Weight and aggregate events per user-item inside Arrow.
 
-def apply_event_weights(events: pd.DataFrame) -> pd.DataFrame:
+    EN: Filters, weights, and sums events with pyarrow.compute; only the aggregated pairs reach pandas.
+    FA: رویدادها با pyarrow.compute فیلتر، وزن‌دهی و جمع می‌شوند؛ فقط جفت‌های تجمیع‌شده به pandas می‌رسند.
     """
-    Attach implicit feedback weights to events.
+    table = pq.read_table(events_path, columns=["visitorid", "itemid", "event"])
+    event_types = pa.array(list(EVENT_WEIGHTS), type=pa.string())
+    weights = pa.array(list(EVENT_WEIGHTS.values()), type=pa.float64())
+
+    # EN: Unknown event types get a null index; rows with null index or IDs are dropped
+    # FA: انواع رویداد ناشناخته اندیس تهی می‌گیرند؛ ردیف‌های با اندیس یا شناسه تهی حذف می‌شوند
+    event_index = pc.index_in(table["event"].cast(pa.string()), value_set=event_types)
+    keep = pc.and_(
+        pc.is_valid(event_index),
+        pc.and_(pc.is_valid(table["visitorid"]), pc.is_valid(table["itemid"])),
+    )
+    weighted = pa.table(
+        {
+            "visitorid": table["visitorid"].filter(keep),
+            "itemid": table["itemid"].filter(keep),
+            "score": pc.take(weights, event_index.filter(keep)),
+        }
+    )
+    del table
 
-    EN: Maps event types to numeric weights and aggregates per user-item.
-    FA: نوع رویداد را به وزن عددی نگاشت کرده و در سطح کاربر-کالا تجمیع می‌کند.
-    """
-    # EN: Keep only known event types for consistency
-    # FA: فقط رویدادهای شناخته‌شده را نگه می‌داریم تا سازگار بماند
-    events = events[events["event"].isin(EVENT_WEIGHTS.keys())].copy()
-    # EN: Map each event string to its configured weight
-    # FA: هر رویداد را به وزن تعریف‌شده‌اش نگاشت می‌کنیم
-    events["weight"] = events["event"].map(EVENT_WEIGHTS)
-    # EN: Aggregate weights per (visitorid, itemid) pair
-    # FA: وزن‌ها را در سطح (کاربر، کالا) تجمیع می‌کنیم
+    # EN: Hash aggregation in Arrow, then sort so row order matches a sorted pandas groupby
+    # FA: تجمیع هش در Arrow و سپس مرتب‌سازی تا ترتیب ردیف‌ها مانند groupby مرتب pandas باشد
     aggregated = (
-        events.groupby(["visitorid", "itemid"], as_index=False)["weight"]
-        .sum()
-        .rename(columns={"weight": "score"})
+        weighted.group_by(["visitorid", "itemid"])
+        .aggregate([("score", "sum")])
+        .sort_by([("visitorid", "ascending"), ("itemid", "ascending")])
+    )
+    return pd.DataFrame(
+        {
+            "visitorid": aggregated["visitorid"].dictionary_encode().to_pandas(),
+            "itemid": aggregated["itemid"].dictionary_encode().to_pandas(),
+            "score": aggregated["score_sum"].to_numpy(),
+        }
     )
-    return aggregated
 
 
 def filter_minimums(interactions: pd.DataFrame) -> pd.DataFrame:
@@ -70,65 +85,56 @@ def filter_minimums(interactions: pd.DataFrame) -> pd.DataFrame:
     EN: Removes sparse users/items to improve matrix quality.
     FA: کاربران و کالاهای بسیار کم‌تعامل را حذف می‌کند تا کیفیت ماتریس بهبود یابد.
     """
-    # EN: Count interactions per user
-    # FA: تعداد تعاملات هر کاربر را می‌شماریم
-    user_counts = interactions["visitorid"].value_counts()
-    valid_users = user_counts[user_counts >= MIN_USER_EVENTS].index
-
-    # EN: Filter out users below threshold
-    # FA: کاربران پایین‌تر از آستانه حذف می‌شوند
-    filtered = interactions[interactions["visitorid"].isin(valid_users)].copy()
-
-    # EN: Count interactions per item (unique users)
-    # FA: تعداد کاربران یکتا برای هر کالا را می‌شماریم
-    item_counts = filtered.groupby("itemid")["visitorid"].nunique()
-    valid_items = item_counts[item_counts >= MIN_ITEM_EVENTS].index
-
-    # EN: Keep items that meet the threshold
-    # FA: کالاهای واجد شرایط آستانه نگه داشته می‌شوند
-    filtered = filtered[filtered["itemid"].isin(valid_items)].copy()
+    # EN: Annotate per-row user interaction counts and keep users meeting the threshold
+    # FA: تعداد تعاملات کاربر هر ردیف محاسبه و کاربران واجد آستانه نگه داشته می‌شوند
+    user_counts = interactions.groupby("visitorid", observed=True)["itemid"].transform("size")
+    filtered = interactions[user_counts.to_numpy() >= MIN_USER_EVENTS]
+
+    # EN: Annotate per-row unique-user counts per item and keep items meeting the threshold
+    # FA: تعداد کاربران یکتای کالای هر ردیف محاسبه و کالاهای واجد آستانه نگه داشته می‌شوند
+    item_counts = filtered.groupby("itemid", observed=True)["visitorid"].transform("nunique")
+    filtered = filtered[item_counts.to_numpy() >= MIN_ITEM_EVENTS].copy()
     return filtered
 
 
-def build_mappings(interactions: pd.DataFrame) -> Tuple[Dict[str, int], Dict[str, int]]:
+def encode_ids(ids: pd.Series) -> Tuple[np.ndarray, Dict[str, int]]:
     """
-    Create integer index mappings for users and items.
+    Encode an ID column as contiguous integer codes.
 
-    EN: Maps string IDs to contiguous integer indices.
-    FA: شناسه‌های متنی را به اندیس‌های صحیح متوالی نگاشت می‌کند.
+    EN: Factorizes in one C pass (first-appearance order) and returns codes plus the ID->index dict.
+    FA: در یک گذر (به ترتیب اولین ظهور) شناسه‌ها را کدگذاری کرده و کدها و دیکشنری شناسه به اندیس را برمی‌گرداند.
     """
-    unique_users = interactions["visitorid"].unique()
-    unique_items = interactions["itemid"].unique()
+    codes, uniques = pd.factorize(ids, sort=False)
+    mapping = dict(zip(uniques.tolist(), range(len(uniques))))
+    index_dtype = np.int32 if len(uniques) <= np.iinfo(np.int32).max else np.int64
+    return codes.astype(index_dtype, copy=False), mapping
 
-    # EN: Build dictionaries for fast lookup
-    # FA: دیکشنری‌های نگاشت سریع می‌سازیم
-    user_mapping = {user_id: idx for idx, user_id in enumerate(unique_users)}
-    item_mapping = {item_id: idx for idx, item_id in enumerate(unique_items)}
-    return user_mapping, item_mapping
 
-
-def build_sparse_matrix(
-    interactions: pd.DataFrame, user_mapping: Dict[str, int], item_mapping: Dict[str, int]
-) -> sparse.coo_matrix:
+def build_csr_matrix(
+    rows: np.ndarray, cols: np.ndarray, data: np.ndarray, shape: Tuple[int, int]
+) -> sparse.csr_matrix:
     """
-    Construct a COO sparse matrix from interactions.
+    Construct a CSR matrix directly from row/column codes.
 
-    EN: Uses aggregated scores to populate the matrix.
-    FA: ماتریس تنک را با امتیازهای تجمیع‌شده پر می‌کند.
+    EN: Sorts entries by row, builds indptr from row counts, and sums duplicate entries in place.
+    FA: ورودی‌ها را بر اساس ردیف مرتب کرده، indptr را از شمارش ردیف‌ها ساخته و تکراری‌ها را درجا جمع می‌کند.
     """
-    # EN: Map string IDs to integer indices
-    # FA: شناسه‌های متنی را به اندیس عددی تبدیل می‌کنیم
-    user_indices = interactions["visitorid"].map(user_mapping).to_numpy()
-    item_indices = interactions["itemid"].map(item_mapping).to_numpy()
-    scores = interactions["score"].to_numpy()
-
-    # EN: Build sparse matrix (users x items)
-    # FA: ساخت ماتریس تنک با ابعاد (کاربر × کالا)
-    matrix = sparse.coo_matrix(
-        (scores, (user_indices, item_indices)),
-        shape=(len(user_mapping), len(item_mapping)),
-        dtype=np.float32,
+    num_rows, _ = shape
+    index_dtype = np.int32 if max(*shape, len(rows)) <= np.iinfo(np.int32).max else np.int64
+
+    # EN: Skip the stable argsort when rows are already grouped in order
+    # FA: اگر ردیف‌ها از قبل مرتب باشند، argsort پایدار انجام نمی‌شود
+    if len(rows) and np.any(rows[1:] < rows[:-1]):
+        order = np.argsort(rows, kind="stable")
+        rows, cols, data = rows[order], cols[order], data[order]
+
+    indptr = np.zeros(num_rows + 1, dtype=index_dtype)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(cols, dtype=index_dtype), indptr),
+        shape=shape,
     )
+    matrix.sum_duplicates()
     return matrix
 
 
@@ -146,35 +152,49 @@ def build_interaction_matrix(processed_dir: Path | None = None) -> None:
     # FA: مطمئن می‌شویم پوشه خروجی وجود دارد
     ensure_dir(processed_dir)
 
+    # EN: Apply weights to implicit events and aggregate per user-item without a pandas round trip
+    # FA: وزن‌دهی به رویدادهای ضمنی و تجمیع در سطح کاربر-کالا بدون عبور از pandas
     print(f"Loading cleaned events from: {processed_dir}")
-    events = load_clean_events(processed_dir)
-
-    # EN: Apply weights to implicit events
-    # FA: وزن‌دهی به رویدادهای ضمنی
-    interactions = apply_event_weights(events)
+    interactions = aggregate_event_weights(processed_dir / "events_clean.parquet")
 
     # EN: Filter out very sparse users/items
     # FA: حذف کاربران/کالاهای بسیار کم‌تعامل
     interactions = filter_minimums(interactions)
 
-    # EN: Build ID-to-index mappings
-    # FA: ساخت نگاشت شناسه به اندیس
-    user_mapping, item_mapping = build_mappings(interactions)
+    # EN: Build ID-to-index mappings; the factorized codes index the matrix directly
+    # FA: ساخت نگاشت شناسه به اندیس؛ کدهای حاصل مستقیماً اندیس ماتریس هستند
+    user_codes, user_mapping = encode_ids(interactions["visitorid"])
+    item_codes, item_mapping = encode_ids(interactions["itemid"])
 
     # EN: Create sparse interaction matrix
     # FA: ایجاد ماتریس تنک تعاملی
-    interaction_matrix = build_sparse_matrix(interactions, user_mapping, item_mapping)
+    interaction_matrix = build_csr_matrix(
+        user_codes,
+        item_codes,
+        interactions["score"].to_numpy(dtype=np.float32),
+        shape=(len(user_mapping), len(item_mapping)),
+    )
 
     # EN: Save artifacts
     # FA: ذخیره مصنوعات پردازش
     matrix_path = processed_dir / "user_item_interactions.npz"
-    user_map_path = processed_dir / "user_mapping.pkl"
-    item_map_path = processed_dir / "item_mapping.pkl"
+    user_map_path = processed_dir / "user_ids.npy"
+    item_map_path = processed_dir / "item_ids.npy"
 
     ensure_dir(processed_dir)
-    sparse.save_npz(matrix_path, interaction_matrix)
-    save_pickle(user_mapping, user_map_path)
-    save_pickle(item_mapping, item_map_path)
+    # EN: Stored uncompressed so loaders can memory-map the CSR arrays instead of inflating them
+    # FA: بدون فشرده‌سازی ذخیره می‌شود تا بارگذارها آرایه‌های CSR را نگاشت حافظه کنند نه اینکه از حالت فشرده باز کنند
+    sparse.save_npz(matrix_path, interaction_matrix, compressed=False)
+    # EN: Mappings are stored as code-ordered ID arrays (dict insertion order is the code order)
+    # FA: نگاشت‌ها به صورت آرایه شناسه‌ها به ترتیب کد ذخیره می‌شوند (ترتیب درج دیکشنری همان ترتیب کد است)
+    save_id_array(user_mapping, user_map_path)
+    save_id_array(item_mapping, item_map_path)
+    # EN: Tiny sidecar with code-0 IDs so smoke tests can pick a known user/item without loading mappings
+    # FA: فایل کوچک کناری با شناسه‌های کد صفر تا تست‌ها بدون بارگذاری نگاشت‌ها کاربر/کالای معتبر انتخاب کنند
+    save_json(
+        {"user": next(iter(user_mapping), None), "item": next(iter(item_mapping), None)},
+        processed_dir / "first_ids.json",
+    )
 
     # EN: Print summary statistics
     # FA: چاپ آمار خلاصه
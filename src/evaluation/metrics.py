@@ -7,11 +7,47 @@ FA: متریک‌های دقت، یادآوری، NDCG و MAP در برش K را
 
 from __future__ import annotations
 
-import math
-from typing import Dict, List, Set
+from typing import AbstractSet, Dict, Iterable
 
+import numpy as np
 
-def precision_at_k(recommended: List[str], relevant: Set[str], k: int) -> float:
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+    # EN: Without numba the helpers run as plain Python over numpy arrays
+    # FA: بدون numba توابع کمکی به صورت پایتون ساده روی آرایه‌های numpy اجرا می‌شوند
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# EN: Precomputed 1/log2(rank + 1) discounts; longer lists compute theirs on the fly
+# FA: ضرایب 1/log2(rank + 1) از پیش محاسبه شده‌اند؛ فهرست‌های طولانی‌تر در لحظه محاسبه می‌کنند
+MAX_DISCOUNT_RANK = 1024
+log2_discounts = 1.0 / np.log2(np.arange(2, MAX_DISCOUNT_RANK + 2, dtype=np.float64))
+
+
+@njit(cache=True)
+def _discounts(n: int) -> np.ndarray:
+    if n <= MAX_DISCOUNT_RANK:
+        return log2_discounts[:n]
+    return 1.0 / np.log2(np.arange(2, n + 2).astype(np.float64))
+
+
+@njit(cache=True)
+def _hit_vector(recs: np.ndarray, relevant_mask: np.ndarray, k: int) -> np.ndarray:
+    # EN: 1.0 where the top-K item is relevant; out-of-range codes (e.g. -1 padding) never hit
+    # FA: برای آیتم مرتبط در K برتر مقدار 1.0؛ کدهای خارج از دامنه (مثل -1) هرگز برخورد نیستند
+    top = recs[: max(k, 0)]
+    if relevant_mask.shape[0] == 0:
+        return np.zeros(top.shape[0], dtype=np.float64)
+    valid = (top >= 0) & (top < relevant_mask.shape[0])
+    return (relevant_mask[np.where(valid, top, 0)] & valid).astype(np.float64)
+
+
+@njit(cache=True)
+def precision_at_k(recs: np.ndarray, relevant_mask: np.ndarray, k: int) -> float:
     """
     Compute Precision@K.
 
@@ -20,76 +56,123 @@ def precision_at_k(recommended: List[str], relevant: Set[str], k: int) -> float:
     """
     if k <= 0:
         return 0.0
-    top_k = recommended[:k]
-    hits = sum(1 for item in top_k if item in relevant)
-    return hits / k
+    return _hit_vector(recs, relevant_mask, k).sum() / k
 
 
-def recall_at_k(recommended: List[str], relevant: Set[str], k: int) -> float:
+@njit(cache=True)
+def recall_at_k(recs: np.ndarray, relevant_mask: np.ndarray, k: int) -> float:
     """
     Compute Recall@K.
 
     EN: Fraction of all relevant items that appear in top-K.
     FA: نسبت کل اقلام مرتبط که در K پیشنهاد اول حضور دارند.
     """
-    if not relevant:
+    num_relevant = relevant_mask.sum()
+    if num_relevant == 0:
         return 0.0
-    top_k = recommended[:k]
-    hits = sum(1 for item in top_k if item in relevant)
-    return hits / len(relevant)
+    return _hit_vector(recs, relevant_mask, k).sum() / num_relevant
 
 
-def ndcg_at_k(recommended: List[str], relevant: Set[str], k: int) -> float:
+@njit(cache=True)
+def ndcg_at_k(recs: np.ndarray, relevant_mask: np.ndarray, k: int) -> float:
     """
     Compute NDCG@K (Normalized Discounted Cumulative Gain).
 
     EN: Rewards relevant items at higher ranks with log discount.
     FA: اقلام مرتبط در رتبه‌های بالاتر را با ضریب لگاریتمی تشویق می‌کند.
     """
-    top_k = recommended[:k]
-    dcg = 0.0
-    for idx, item in enumerate(top_k, start=1):
-        if item in relevant:
-            dcg += 1.0 / math.log2(idx + 1)
+    hits = _hit_vector(recs, relevant_mask, k)
+    dcg = (hits * _discounts(hits.shape[0])).sum()
 
     # EN: Ideal DCG assumes all relevant items are at the top
     # FA: DCG ایده‌آل فرض می‌کند تمام اقلام مرتبط در ابتدای لیست باشند
-    ideal_hits = min(len(relevant), k)
-    idcg = sum(1.0 / math.log2(idx + 1) for idx in range(1, ideal_hits + 1))
+    idcg = _discounts(max(min(relevant_mask.sum(), k), 0)).sum()
     if idcg == 0:
         return 0.0
     return dcg / idcg
 
 
-def average_precision_at_k(recommended: List[str], relevant: Set[str], k: int) -> float:
+@njit(cache=True)
+def average_precision_at_k(recs: np.ndarray, relevant_mask: np.ndarray, k: int) -> float:
     """
     Compute MAP-style Average Precision at K.
 
     EN: Mean of precision values at each rank where the item is relevant.
     FA: میانگین دقت در رتبه‌هایی که آیتم مربوطه مرتبط است.
     """
-    top_k = recommended[:k]
-    ap_sum = 0.0
-    hit_count = 0
-    for idx, item in enumerate(top_k, start=1):
-        if item in relevant:
-            hit_count += 1
-            ap_sum += hit_count / idx
+    hits = _hit_vector(recs, relevant_mask, k)
+    hit_count = hits.sum()
     if hit_count == 0:
         return 0.0
-    return ap_sum / hit_count
+    precision_at_rank = np.cumsum(hits) / np.arange(1, hits.shape[0] + 1)
+    return (precision_at_rank * hits).sum() / hit_count
+
+
+def _hits_from_codes(recs: Iterable[int], relevant: AbstractSet[int], k: int) -> np.ndarray:
+    # EN: Pure-Python path: int-code set membership, stopping at rank K without slicing `recs`
+    # FA: مسیر پایتون خالص: عضویت کد عددی در مجموعه و توقف در رتبه K بدون برش `recs`
+    hits = np.zeros((1, max(k, 0)), dtype=np.bool_)
+    for idx, item in enumerate(recs):
+        if idx >= k:
+            break
+        hits[0, idx] = item in relevant
+    return hits
 
 
-def evaluate_user_ranking(recommended: List[str], relevant: Set[str], k: int) -> Dict[str, float]:
+def evaluate_user_ranking(
+    recs: np.ndarray | Iterable[int], relevant: np.ndarray | AbstractSet[int], k: int
+) -> Dict[str, float]:
     """
     Compute all ranking metrics for a single user.
 
-    EN: Returns a dictionary with precision, recall, ndcg, and map at K.
-    FA: دیکشنری شامل متریک‌های دقت، یادآوری، NDCG و MAP در برش K را برمی‌گرداند.
+    EN: `recs` holds dense int item codes; `relevant` is a boolean mask over those codes or a (frozen)set of them.
+    FA: `recs` شامل کدهای فشرده کالاهاست و `relevant` ماسک بولی روی همین کدها یا مجموعه‌ای (frozenset) از آن‌هاست.
     """
+    if isinstance(relevant, AbstractSet):
+        batch = evaluate_ranking_batch(_hits_from_codes(recs, relevant, k), np.array([len(relevant)]), k)
+        return {name: float(values[0]) for name, values in batch.items()}
+
+    recs = np.asarray(recs, dtype=np.int32)
+    relevant_mask = np.asarray(relevant, dtype=np.bool_)
+    return {
+        f"precision@{k}": precision_at_k(recs, relevant_mask, k),
+        f"recall@{k}": recall_at_k(recs, relevant_mask, k),
+        f"ndcg@{k}": ndcg_at_k(recs, relevant_mask, k),
+        f"map@{k}": average_precision_at_k(recs, relevant_mask, k),
+    }
+
+
+def evaluate_ranking_batch(hits: np.ndarray, num_relevant: np.ndarray, k: int) -> Dict[str, np.ndarray]:
+    """
+    Compute all ranking metrics for many users at once.
+
+    EN: Takes an (n_users, K) boolean hit matrix and per-user relevant counts; returns per-user arrays.
+    FA: ماتریس بولی برخورد (n_users, K) و تعداد اقلام مرتبط هر کاربر را گرفته و آرایه‌های متریک را برمی‌گرداند.
+    """
+    hits = np.asarray(hits, dtype=bool)[:, :k]
+    num_relevant = np.asarray(num_relevant, dtype=np.float64)
+    hits_f = hits.astype(np.float64)
+    hit_count = hits_f.sum(axis=1)
+    ranks = np.arange(1, hits.shape[1] + 1, dtype=np.float64)
+
+    # EN: Log discounts and ideal DCG prefix sums are shared by all users
+    # FA: ضرایب لگاریتمی و مجموع پیشوندی DCG ایده‌آل بین همه کاربران مشترک است
+    all_discounts = _discounts(k)
+    discounts = all_discounts[: hits.shape[1]]
+    ideal_dcg = np.concatenate(([0.0], np.cumsum(all_discounts)))
+    idcg = ideal_dcg[np.minimum(num_relevant, k).astype(np.int64)]
+    dcg = hits_f @ discounts
+    ap_sum = (hits_f * np.cumsum(hits_f, axis=1) / ranks).sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = hit_count / k if k > 0 else np.zeros_like(hit_count)
+        recall = np.where(num_relevant > 0, hit_count / num_relevant, 0.0)
+        ndcg = np.where(idcg > 0, dcg / idcg, 0.0)
+        average_precision = np.where(hit_count > 0, ap_sum / hit_count, 0.0)
+
     return {
-        f"precision@{k}": precision_at_k(recommended, relevant, k),
-        f"recall@{k}": recall_at_k(recommended, relevant, k),
-        f"ndcg@{k}": ndcg_at_k(recommended, relevant, k),
-        f"map@{k}": average_precision_at_k(recommended, relevant, k),
+        f"precision@{k}": precision,
+        f"recall@{k}": recall,
+        f"ndcg@{k}": ndcg,
+        f"map@{k}": average_precision,
     }
@@ -7,34 +7,48 @@ FA: مدل‌های پایه، CF و هایبرید را روی داده آمو
 
 from __future__ import annotations
 
+import functools
 import json
 from pathlib import Path
-from typing import Dict, List, Tuple
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import yaml
+from joblib import Parallel, delayed, effective_n_jobs
 from scipy import sparse
 
-from src.evaluation.metrics import evaluate_user_ranking
+from src.data.preprocess import build_csr_matrix
+from src.evaluation.metrics import evaluate_ranking_batch
 from src.models.baseline import PopularityRecommender
 from src.models.collaborative import CollaborativeRecommender
 from src.models.content_based import ContentBasedRecommender
 from src.models.hybrid import HybridRecommender
-from src.utils.io import ensure_dir, load_pickle
+from src.utils.io import ensure_dir, load_id_mapping
 
 
-def load_yaml_safe(path: Path) -> Dict:
+@functools.lru_cache(maxsize=8)
+def _load_yaml_cached(path_str: str, mtime_ns: int) -> Mapping[str, Any]:
+    """
+    EN: Parse a YAML file once per (path, mtime) pair; the result is read-only.
+    FA: فایل YAML به ازای هر (مسیر، زمان تغییر) یک‌بار خوانده می‌شود؛ نتیجه فقط‌خواندنی است.
+    """
+    with open(path_str, "r", encoding="utf-8") as f:
+        return MappingProxyType(yaml.safe_load(f) or {})
+
+
+def load_yaml_safe(path: Path) -> Mapping[str, Any]:
     """
     Load YAML config if exists, else return empty dict.
 
-    EN: Safe helper to avoid errors when config is missing.
-    FA: تابع کمکی برای خواندن YAML در صورت وجود و جلوگیری از خطا در نبود فایل.
+    EN: Safe helper to avoid errors when config is missing; cached until the file changes.
+    FA: تابع کمکی برای خواندن YAML در صورت وجود و جلوگیری از خطا در نبود فایل؛ تا تغییر فایل کش می‌شود.
     """
     if not path.exists():
         return {}
-    with path.open("r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+    return _load_yaml_cached(str(path), path.stat().st_mtime_ns)
 
 
 def build_train_matrix(
@@ -43,24 +57,78 @@ def build_train_matrix(
     """
     Build sparse user-item matrix from train interactions using existing mappings.
 
-    EN: Recreates a COO/CSR matrix restricted to known users/items.
+    EN: Recreates a CSR matrix restricted to known users/items.
     FA: ماتریس تنک را با نگاشت‌های موجود برای کاربران/کالاهای شناخته‌شده می‌سازد.
     """
-    rows: List[int] = []
-    cols: List[int] = []
-    data: List[float] = []
-    for row in interactions.itertuples():
-        if row.visitorid not in user_mapping or row.itemid not in item_mapping:
-            # EN: Skip unknown IDs to stay consistent with mappings
-            # FA: شناسه‌های ناشناخته را برای سازگاری حذف می‌کنیم
-            continue
-        rows.append(user_mapping[row.visitorid])
-        cols.append(item_mapping[row.itemid])
-        data.append(row.score)
     num_users = max(user_mapping.values()) + 1
     num_items = max(item_mapping.values()) + 1
-    coo = sparse.coo_matrix((data, (rows, cols)), shape=(num_users, num_items))
-    return coo.tocsr()
+    # EN: Map IDs column-wise; unknown IDs become NaN and are dropped to stay consistent with mappings
+    # FA: شناسه‌ها به صورت ستونی نگاشت می‌شوند؛ شناسه‌های ناشناخته NaN شده و برای سازگاری حذف می‌شوند
+    user_idx = interactions["visitorid"].map(user_mapping)
+    item_idx = interactions["itemid"].map(item_mapping)
+    known = (user_idx.notna() & item_idx.notna()).to_numpy()
+    # EN: Use the narrowest index dtype that fits the matrix dimensions
+    # FA: کوچک‌ترین نوع اندیس متناسب با ابعاد ماتریس استفاده می‌شود
+    index_dtype = np.int32 if max(num_users, num_items) <= np.iinfo(np.int32).max else np.int64
+    rows = user_idx.to_numpy()[known].astype(index_dtype)
+    cols = item_idx.to_numpy()[known].astype(index_dtype)
+    data = interactions["score"].to_numpy(dtype=np.float32)[known]
+    # EN: Build CSR directly; duplicate (user, item) events are summed in place
+    # FA: CSR مستقیماً ساخته می‌شود؛ رویدادهای تکراری (کاربر، کالا) درجا جمع می‌شوند
+    return build_csr_matrix(rows, cols, data, shape=(num_users, num_items))
+
+
+def _recommend_chunk(
+    recommender: Callable[[str], List[Tuple[str, float]]], user_ids: List[str]
+) -> Tuple[List[int], List[List[Tuple[str, float]]]]:
+    """
+    Serve one contiguous chunk of users.
+
+    EN: Returns chunk-local served positions and their recommendation lists.
+    FA: موقعیت‌های محلی کاربران سرویس‌شده و فهرست پیشنهادهای آن‌ها را برمی‌گرداند.
+    """
+    served: List[int] = []
+    recs: List[List[Tuple[str, float]]] = []
+    for pos, user_id in enumerate(user_ids):
+        try:
+            recs.append(recommender(user_id))
+        except ValueError:
+            # EN: If model cannot serve the user, skip
+            # FA: در صورت ناتوانی مدل برای کاربر، رد می‌شود
+            continue
+        served.append(pos)
+    return served, recs
+
+
+def recommend_each(
+    recommender: Callable[[str], List[Tuple[str, float]]],
+    user_ids: List[str],
+    n_jobs: int = 1,
+) -> Tuple[np.ndarray, List[List[Tuple[str, float]]]]:
+    """
+    Call a single-user recommender for each user, skipping users it cannot serve.
+
+    EN: Users are split into one contiguous chunk per joblib worker; results keep the input order.
+    FA: کاربران به یک بخش پیوسته برای هر کارگر joblib تقسیم می‌شوند؛ نتایج ترتیب ورودی را حفظ می‌کنند.
+    """
+    workers = min(effective_n_jobs(n_jobs), max(len(user_ids), 1))
+    if workers <= 1:
+        served, recs = _recommend_chunk(recommender, user_ids)
+        return np.asarray(served, dtype=np.int64), recs
+
+    bounds = np.linspace(0, len(user_ids), workers + 1).astype(np.int64)
+    # EN: Each worker receives the (read-only) fitted model once, together with its chunk
+    # FA: هر کارگر مدل آموزش‌دیده (فقط‌خواندنی) را یک‌بار همراه با بخش خود دریافت می‌کند
+    chunk_results = Parallel(n_jobs=workers, backend="loky")(
+        delayed(_recommend_chunk)(recommender, user_ids[start:stop])
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    )
+    served_all: List[np.ndarray] = []
+    recs_all: List[List[Tuple[str, float]]] = []
+    for start, (served, recs) in zip(bounds[:-1], chunk_results):
+        served_all.append(np.asarray(served, dtype=np.int64) + start)
+        recs_all.extend(recs)
+    return np.concatenate(served_all), recs_all
 
 
 def evaluate_models(
@@ -69,18 +137,22 @@ def evaluate_models(
     processed_dir: Path,
     results_dir: Path,
     k: int = 10,
+    n_jobs: int = -1,
 ) -> None:
     """
     Train/evaluate baseline, CF, and hybrid models.
 
-    EN: Loops through users in test set, computes ranking metrics, saves summaries.
+    EN: Scores all test users per model, computes ranking metrics in batch, saves summaries.
     FA: برای کاربران موجود در آزمون، متریک‌های رتبه‌بندی را محاسبه و خلاصه‌ها را ذخیره می‌کند.
     """
     # EN: Load mappings and item properties
     # FA: نگاشت‌ها و ویژگی‌های اقلام را بارگذاری می‌کنیم
-    user_mapping = load_pickle(processed_dir / "user_mapping.pkl")
-    item_mapping = load_pickle(processed_dir / "item_mapping.pkl")
-    item_props = pd.read_parquet(processed_dir / "item_properties_clean.parquet")
+    user_mapping = load_id_mapping(processed_dir, "user")
+    item_mapping = load_id_mapping(processed_dir, "item")
+    # EN: Memory-map the properties file and read only the columns the content model needs
+    # FA: فایل ویژگی‌ها به صورت نگاشت حافظه باز شده و فقط ستون‌های مورد نیاز مدل محتوایی خوانده می‌شوند
+    props_file = pq.ParquetFile(processed_dir / "item_properties_clean.parquet", memory_map=True)
+    item_props = props_file.read(columns=list(ContentBasedRecommender.needed_cols)).to_pandas()
 
     # EN: Build train matrix from train interactions to avoid leakage from test
     # FA: برای جلوگیری از نشت داده آزمون، ماتریس را فقط از تعاملات آموزش می‌سازیم
@@ -100,6 +172,11 @@ def evaluate_models(
         regularization=cf_cfg.get("regularization", 0.1),
         iterations=cf_cfg.get("iterations", 10),
         random_state=cf_cfg.get("random_state", 42),
+        confidence_alpha=cf_cfg.get("confidence_alpha", 0.0),
+        use_cg=cf_cfg.get("use_cg", False),
+        cg_iters=cf_cfg.get("cg_iters", 3),
+        device=cf_cfg.get("device", "cpu"),
+        use_ann=cf_cfg.get("use_ann", False),
     ).fit(train_matrix, user_mapping=user_mapping, item_mapping=item_mapping)
 
     content_model = ContentBasedRecommender().fit(item_props)
@@ -113,38 +190,58 @@ def evaluate_models(
         filter_seen=hybrid_cfg.get("filter_seen", True),
     )
 
+    # EN: Each model maps a list of user IDs to (served row positions, recommendation lists)
+    # FA: هر مدل فهرست کاربران را به (موقعیت کاربران سرویس‌شده، فهرست پیشنهادها) نگاشت می‌کند
+    def cf_batch(user_ids: List[str]) -> Tuple[np.ndarray, List[List[Tuple[str, float]]]]:
+        served = np.flatnonzero([uid in cf_model.user_mapping for uid in user_ids])
+        return served, cf_model.recommend_batch([user_ids[i] for i in served], top_k=k)
+
     models = {
-        "baseline": lambda uid: pop_model.recommend(uid, top_k=k),
-        "cf": lambda uid: cf_model.recommend(uid, top_k=k),
-        "hybrid": lambda uid: hybrid_model.recommend_for_user(uid, top_k=k),
+        "baseline": lambda uids: recommend_each(
+            lambda uid: pop_model.recommend(uid, top_k=k), uids, n_jobs=n_jobs
+        ),
+        "cf": cf_batch,
+        "hybrid": lambda uids: recommend_each(
+            lambda uid: hybrid_model.recommend_for_user(uid, top_k=k), uids, n_jobs=n_jobs
+        ),
     }
 
-    user_metrics_rows: List[Dict] = []
-    evaluated_users = 0
-
-    # EN: Group test interactions by user to evaluate per-user ground truth
-    # FA: تعاملات آزمون را بر اساس کاربر گروه‌بندی می‌کنیم تا حقیقت زمین را بسازیم
-    for user_id, group in test_df.groupby("visitorid"):
-        if user_id not in user_mapping:
-            continue
-        relevant = set(group["itemid"])
-        if not relevant:
-            continue
-        evaluated_users += 1
-        for model_name, recommender in models.items():
-            try:
-                recs = recommender(user_id)
-                rec_ids = [iid for iid, _ in recs]
-            except ValueError:
-                # EN: If model cannot serve the user, skip
-                # FA: در صورت ناتوانی مدل برای کاربر، رد می‌شود
-                continue
-            metrics = evaluate_user_ranking(rec_ids, relevant, k)
-            row = {"user_id": user_id, "model": model_name}
-            row.update(metrics)
-            user_metrics_rows.append(row)
-
-    user_metrics_df = pd.DataFrame(user_metrics_rows)
+    # EN: Encode test ground truth once as sorted (user_row, item_code) keys
+    # FA: حقیقت زمین آزمون یک‌بار به صورت کلیدهای مرتب (ردیف کاربر، کد کالا) کدگذاری می‌شود
+    test_known = test_df[test_df["visitorid"].isin(list(user_mapping))]
+    user_rows, eval_users = pd.factorize(test_known["visitorid"], sort=True)
+    item_codes, eval_items = pd.factorize(test_known["itemid"], use_na_sentinel=False)
+    num_eval_items = max(len(eval_items), 1)
+    relevant_keys = np.unique(user_rows.astype(np.int64) * num_eval_items + item_codes)
+    num_relevant = np.bincount(relevant_keys // num_eval_items, minlength=len(eval_users))
+    eval_user_ids = list(eval_users)
+    eval_item_index = pd.Index(eval_items)
+    evaluated_users = len(eval_user_ids)
+
+    metric_frames: List[pd.DataFrame] = []
+    for model_name, recommend_many in models.items():
+        served, recs = recommend_many(eval_user_ids)
+        hits = np.zeros((len(served), k), dtype=bool)
+        # EN: Flatten all recommendation lists and test membership with one vectorized lookup
+        # FA: همه فهرست‌ها مسطح شده و عضویت با یک جستجوی برداری بررسی می‌شود
+        lengths = np.fromiter((min(len(r), k) for r in recs), dtype=np.int64, count=len(recs))
+        rec_ids = [iid for r in recs for iid, _ in r[:k]]
+        if rec_ids:
+            rows = np.repeat(np.arange(len(recs)), lengths)
+            cols = np.arange(len(rec_ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            codes = eval_item_index.get_indexer(rec_ids)
+            keys = served[rows].astype(np.int64) * num_eval_items + codes
+            hits[rows, cols] = (codes >= 0) & np.isin(keys, relevant_keys)
+        metrics = evaluate_ranking_batch(hits, num_relevant[served], k)
+        frame = pd.DataFrame(metrics)
+        frame.insert(0, "user_id", [eval_user_ids[i] for i in served])
+        frame.insert(1, "model", model_name)
+        metric_frames.append(frame)
+
+    # EN: Stable sort by user keeps the original per-user, per-model row order
+    # FA: مرتب‌سازی پایدار بر اساس کاربر ترتیب ردیف‌ها را مانند قبل (هر کاربر، هر مدل) حفظ می‌کند
+    user_metrics_df = pd.concat(metric_frames, ignore_index=True)
+    user_metrics_df = user_metrics_df.sort_values("user_id", kind="stable").reset_index(drop=True)
     if user_metrics_df.empty:
         raise ValueError("No users were evaluated; check data and mappings.")
 
@@ -201,8 +298,10 @@ def main() -> None:
     if not train_path.exists() or not test_path.exists():
         raise FileNotFoundError("Train/test splits not found. Run src.evaluation.split first.")
 
-    train_df = pd.read_parquet(train_path)
-    test_df = pd.read_parquet(test_path)
+    # EN: Only read the columns evaluation uses; timestamps are not needed after the split
+    # FA: فقط ستون‌های مورد نیاز ارزیابی خوانده می‌شوند؛ پس از تقسیم به زمان نیازی نیست
+    train_df = pd.read_parquet(train_path, columns=["visitorid", "itemid", "score"], engine="pyarrow")
+    test_df = pd.read_parquet(test_path, columns=["visitorid", "itemid"], engine="pyarrow")
 
     evaluate_models(train_df, test_df, processed_dir, results_dir, k=10)
 
@@ -10,9 +10,10 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
 
-from src.data.preprocess import EVENT_WEIGHTS
+from src.data.preprocess import EVENT_COLUMNS, EVENT_WEIGHTS
 from src.utils.io import ensure_dir
 
 
@@ -31,40 +32,36 @@ def build_train_test_split(
     if not events_path.exists():
         raise FileNotFoundError(f"Missing events file: {events_path}")
 
-    events = pd.read_parquet(events_path)
+    events = pd.read_parquet(events_path, columns=EVENT_COLUMNS, engine="pyarrow")
 
     # EN: Keep only known event types and attach weight without aggregation
     # FA: فقط رویدادهای شناخته‌شده را نگه داشته و وزن را بدون تجمیع اضافه می‌کنیم
     events = events[events["event"].isin(EVENT_WEIGHTS.keys())].copy()
-    events["score"] = events["event"].map(EVENT_WEIGHTS)
+    events["score"] = events["event"].map(EVENT_WEIGHTS).astype(float)
     interactions = events[["visitorid", "itemid", "score", "timestamp"]].copy()
-
-    train_parts = []
-    test_parts = []
-
-    # EN: Group by user and split chronologically
-    # FA: بر اساس کاربر گروه‌بندی کرده و به صورت زمانی تقسیم می‌کنیم
-    for user_id, user_df in interactions.groupby("visitorid"):
-        user_df = user_df.sort_values("timestamp")
-        n = len(user_df)
-        if n < (min_items_in_test + 1):
-            # EN: Skip users without enough interactions to split
-            # FA: کاربرانی که تعامل کافی ندارند حذف می‌شوند
-            continue
-        test_size = max(min_items_in_test, int(n * test_fraction))
-        test_slice = user_df.tail(test_size)
-        train_slice = user_df.head(n - test_size)
-        if len(train_slice) == 0 or len(test_slice) == 0:
-            continue
-        train_parts.append(train_slice)
-        test_parts.append(test_slice)
-
-    if not train_parts or not test_parts:
+    # EN: Encode IDs once as categoricals; sorting and grouping then run on integer codes
+    # FA: شناسه‌ها یک‌بار به نوع دسته‌ای تبدیل می‌شوند؛ مرتب‌سازی و گروه‌بندی روی کدهای عددی انجام می‌شود
+    for col in ("visitorid", "itemid"):
+        interactions[col] = interactions[col].astype("category")
+
+    # EN: Sort once by user then time; a stable sort keeps file order for equal timestamps
+    # FA: یک‌بار بر اساس کاربر و سپس زمان مرتب می‌کنیم؛ مرتب‌سازی پایدار ترتیب رکوردهای هم‌زمان را حفظ می‌کند
+    interactions = interactions.sort_values(["visitorid", "timestamp"], kind="mergesort")
+    grouped = interactions.groupby("visitorid", sort=False, observed=True)
+    n = grouped["itemid"].transform("size").to_numpy()
+    rank = grouped.cumcount().to_numpy()
+
+    # EN: Per-row test size of the owning user; users whose train part would be empty are skipped
+    # FA: اندازه آزمون کاربر مربوط به هر ردیف؛ کاربرانی که بخش آموزششان خالی می‌شود حذف می‌شوند
+    test_size = np.maximum(min_items_in_test, (n * test_fraction).astype(np.int64))
+    eligible = (n >= min_items_in_test + 1) & (test_size < n)
+    is_test = rank >= (n - test_size)
+
+    train_df = interactions[eligible & ~is_test].reset_index(drop=True)
+    test_df = interactions[eligible & is_test].reset_index(drop=True)
+    if train_df.empty or test_df.empty:
         raise ValueError("No users with sufficient interactions for splitting.")
 
-    train_df = pd.concat(train_parts, ignore_index=True)
-    test_df = pd.concat(test_parts, ignore_index=True)
-
     # EN: Save to processed directory for reuse
     # FA: برای استفاده‌های بعدی در مسیر processed ذخیره می‌کنیم
     ensure_dir(processed_dir)
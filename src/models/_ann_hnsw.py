@@ -0,0 +1,53 @@
+"""
+Approximate inner-product search over item factors with hnswlib.
+
+EN: Builds an HNSW index once per model so top-K queries avoid a full scan; hnswlib is imported lazily.
+FA: یک شاخص HNSW برای هر مدل یک‌بار ساخته می‌شود تا پرس‌وجوی K برتر از پیمایش کامل پرهیز کند؛ hnswlib به صورت تنبل وارد می‌شود.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def build_hnsw_index(
+    item_factors: np.ndarray, ef_construction: int = 200, M: int = 16, ef_search: int = 64
+):
+    """
+    Build an inner-product HNSW index over item factors.
+
+    EN: Item labels are row indices of `item_factors`. The search breadth `ef` is fixed here, once, so
+        concurrent queries never mutate the shared index.
+    FA: برچسب کالاها همان اندیس سطرهای `item_factors` است. پهنای جستجو `ef` فقط یک‌بار همین‌جا تنظیم می‌شود
+        تا پرس‌وجوهای هم‌زمان هرگز شاخص مشترک را تغییر ندهند.
+    """
+    try:
+        import hnswlib
+    except ImportError as exc:
+        raise ImportError("use_ann=True requires hnswlib (pip install hnswlib).") from exc
+
+    num_items, dim = item_factors.shape
+    index = hnswlib.Index(space="ip", dim=dim)
+    index.init_index(max_elements=num_items, ef_construction=ef_construction, M=M)
+    index.add_items(np.ascontiguousarray(item_factors, dtype=np.float32), np.arange(num_items))
+    index.set_ef(ef_search)
+    return index
+
+
+def query_hnsw_index(index, user_vector: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the labels of the (approximately) top-k items for one user vector.
+
+    EN: Read-only on the index, so it is safe from concurrent threads; hnswlib searches with
+        max(ef, k), so k above the build-time `ef` still returns k labels.
+    FA: شاخص را فقط می‌خواند و از نخ‌های هم‌زمان امن است؛ hnswlib با max(ef, k) جستجو می‌کند،
+        پس k بزرگ‌تر از `ef` زمان ساخت همچنان k برچسب برمی‌گرداند.
+    """
+    k = min(k, index.get_current_count())
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    labels, _ = index.knn_query(np.asarray(user_vector, dtype=np.float32), k=k)
+    return labels[0].astype(np.int64)
+
+
+__all__ = ["build_hnsw_index", "query_hnsw_index"]
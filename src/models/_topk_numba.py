@@ -0,0 +1,80 @@
+"""
+Fused scoring + exclusion + top-K kernel for CF recommendations.
+
+EN: Scores every item once and keeps only a size-K min-heap; compiled when numba is installed.
+FA: هر کالا یک‌بار امتیازدهی شده و فقط یک min-heap به اندازه K نگه داشته می‌شود؛ در صورت نصب numba کامپایل می‌شود.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+from src.models._als_numba import NUMBA_AVAILABLE, njit
+
+
+@njit(cache=True)
+def _sift_down(heap_scores: np.ndarray, heap_items: np.ndarray, pos: int, size: int) -> None:
+    while True:
+        smallest = pos
+        left = 2 * pos + 1
+        right = left + 1
+        if left < size and heap_scores[left] < heap_scores[smallest]:
+            smallest = left
+        if right < size and heap_scores[right] < heap_scores[smallest]:
+            smallest = right
+        if smallest == pos:
+            return
+        heap_scores[pos], heap_scores[smallest] = heap_scores[smallest], heap_scores[pos]
+        heap_items[pos], heap_items[smallest] = heap_items[smallest], heap_items[pos]
+        pos = smallest
+
+
+@njit(cache=True)
+def topk_score_exclude(
+    item_factors: np.ndarray, user_vec: np.ndarray, excluded_sorted: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-K items by dot-product score, skipping excluded indices, in one pass.
+
+    EN: `excluded_sorted` must be ascending; it is walked with a pointer alongside the item loop.
+    FA: `excluded_sorted` باید صعودی باشد؛ همراه با حلقه کالاها با یک اشاره‌گر پیمایش می‌شود.
+    """
+    num_items, factors = item_factors.shape
+    heap_scores = np.empty(max(k, 0), dtype=np.float64)
+    heap_items = np.empty(max(k, 0), dtype=np.int64)
+    size = 0
+    ex_pos = 0
+    for item in range(num_items):
+        while ex_pos < excluded_sorted.shape[0] and excluded_sorted[ex_pos] < item:
+            ex_pos += 1
+        if ex_pos < excluded_sorted.shape[0] and excluded_sorted[ex_pos] == item:
+            continue
+        score = 0.0
+        for f in range(factors):
+            score += item_factors[item, f] * user_vec[f]
+        if size < k:
+            # EN: Heap not full yet: append and sift up
+            # FA: هیپ هنوز پر نشده: افزودن و بالا بردن
+            pos = size
+            heap_scores[pos] = score
+            heap_items[pos] = item
+            size += 1
+            while pos > 0:
+                parent = (pos - 1) // 2
+                if heap_scores[parent] <= heap_scores[pos]:
+                    break
+                heap_scores[pos], heap_scores[parent] = heap_scores[parent], heap_scores[pos]
+                heap_items[pos], heap_items[parent] = heap_items[parent], heap_items[pos]
+                pos = parent
+        elif k > 0 and score > heap_scores[0]:
+            heap_scores[0] = score
+            heap_items[0] = item
+            _sift_down(heap_scores, heap_items, 0, size)
+
+    order = np.argsort(-heap_scores[:size])
+    return heap_items[:size][order], heap_scores[:size][order]
+
+
+__all__ = ["NUMBA_AVAILABLE", "topk_score_exclude"]
@@ -7,9 +7,9 @@ FA: اقلام محبوب سراسری را به عنوان خط مبنا پیش
 
 from __future__ import annotations
 
-from collections import Counter, defaultdict
 from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
 
 
@@ -25,9 +25,15 @@ class PopularityRecommender:
         # EN: item_scores holds popularity values
         # FA: محبوبیت اقلام در item_scores ذخیره می‌شود
         self.item_scores: Dict[str, float] = {}
-        # EN: user->items mapping for exclusion if needed
-        # FA: نگاشت کاربر به اقلام برای حذف اقلام دیده‌شده
-        self.user_history: Dict[str, set[str]] = defaultdict(set)
+        # EN: Items and scores ordered by popularity rank
+        # FA: اقلام و امتیازها به ترتیب رتبه محبوبیت
+        self.sorted_item_ids: np.ndarray = np.empty(0, dtype=object)
+        self.sorted_scores: np.ndarray = np.empty(0, dtype=np.float64)
+        # EN: Seen-item histories as CSR-like arrays: row u spans hist_items[hist_indptr[u]:hist_indptr[u + 1]]
+        # FA: تاریخچه اقلام دیده‌شده به شکل آرایه‌های شبه CSR: ردیف u بازه hist_items[hist_indptr[u]:hist_indptr[u + 1]] است
+        self.user_index: Dict[str, int] = {}
+        self.hist_indptr: np.ndarray = np.zeros(1, dtype=np.int64)
+        self.hist_items: np.ndarray = np.empty(0, dtype=np.int32)
 
     def fit(self, train_interactions: pd.DataFrame) -> "PopularityRecommender":
         """
@@ -41,14 +47,29 @@ class PopularityRecommender:
 
         # EN: Sum scores per item as popularity measure
         # FA: مجموع امتیازها به‌عنوان محبوبیت آیتم استفاده می‌شود
-        self.item_scores = (
-            train_interactions.groupby("itemid")["score"].sum().sort_values(ascending=False).to_dict()
+        popularity = (
+            train_interactions.groupby("itemid", observed=True)["score"]
+            .sum()
+            .sort_values(ascending=False)
         )
-
-        # EN: Build per-user history for exclusion
-        # FA: تاریخچه کاربران برای حذف اقلام دیده‌شده ساخته می‌شود
-        for row in train_interactions.itertuples():
-            self.user_history[row.visitorid].add(row.itemid)
+        self.item_scores = popularity.to_dict()
+        self.sorted_item_ids = np.asarray(popularity.index.tolist(), dtype=object)
+        self.sorted_scores = popularity.to_numpy(dtype=np.float64)
+
+        # EN: Build per-user history as unique, sorted popularity ranks
+        # FA: تاریخچه کاربران به صورت رتبه‌های محبوبیت یکتا و مرتب ساخته می‌شود
+        num_items = len(self.sorted_item_ids)
+        item_ranks = popularity.index.get_indexer(train_interactions["itemid"])
+        user_codes, user_ids = pd.factorize(train_interactions["visitorid"])
+        valid = (item_ranks >= 0) & (user_codes >= 0)
+        # EN: One combined key per (user, item) pair; np.unique sorts and deduplicates in C
+        # FA: یک کلید ترکیبی برای هر جفت (کاربر، کالا)؛ np.unique در C مرتب و یکتا می‌کند
+        keys = np.unique(user_codes[valid].astype(np.int64) * num_items + item_ranks[valid])
+        key_users = keys // max(num_items, 1)
+        self.user_index = dict(zip(user_ids.tolist(), range(len(user_ids))))
+        self.hist_items = (keys - key_users * num_items).astype(np.int32)
+        self.hist_indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(key_users, minlength=len(user_ids)), out=self.hist_indptr[1:])
 
         print(f"Fitted popularity baseline on {len(self.item_scores):,} items.")
         return self
@@ -65,18 +86,17 @@ class PopularityRecommender:
         if not self.item_scores:
             raise RuntimeError("Model not fitted. Call fit() first.")
 
-        seen = self.user_history.get(user_id, set()) if exclude_interacted else set()
-
-        # EN: Iterate through popularity ranking and skip seen items
-        # FA: در لیست محبوبیت حرکت کرده و اقلام دیده‌شده را رد می‌کنیم
-        recs: List[Tuple[str, float]] = []
-        for item_id, score in self.item_scores.items():
-            if item_id in seen:
-                continue
-            recs.append((item_id, score))
-            if len(recs) >= top_k:
-                break
-        return recs
+        num_items = len(self.sorted_item_ids)
+        user_idx = self.user_index.get(user_id) if exclude_interacted else None
+        if user_idx is not None:
+            # EN: The first top_k + |seen| ranks always contain top_k unseen items, so scan only that window
+            # FA: K+|دیده‌شده| رتبه اول همیشه K قلم دیده‌نشده دارد، پس فقط همین پنجره بررسی می‌شود
+            seen = self.hist_items[self.hist_indptr[user_idx] : self.hist_indptr[user_idx + 1]]
+            window = min(top_k + len(seen), num_items)
+            ranks = np.delete(np.arange(window), seen[: np.searchsorted(seen, window)])[:top_k]
+        else:
+            ranks = np.arange(min(top_k, num_items))
+        return list(zip(self.sorted_item_ids[ranks].tolist(), self.sorted_scores[ranks].tolist()))
 
 
 __all__ = ["PopularityRecommender"]
@@ -8,12 +8,32 @@ FA: یک مدل فیلترینگ مشارکتی سبک با فاکتورگیری
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
-from scipy import sparse
+from scipy import linalg, sparse
 
-from src.utils.io import load_pickle, save_pickle, ensure_dir
+from src.models._als_numba import als_step_cg_csr, als_step_csr
+from src.models._als_torch import fit_als_torch
+from src.models._ann_hnsw import build_hnsw_index, query_hnsw_index
+from src.models._topk_numba import NUMBA_AVAILABLE, topk_score_exclude
+from src.models.recommendations import Recommendations
+from src.utils.io import ensure_dir, load_id_mapping, load_json, load_mapping_pickle, save_json
+
+# EN: Ranking quality does not need FP64; FP32 halves memory traffic for the scoring matvec/GEMM
+# FA: کیفیت رتبه‌بندی به FP64 نیاز ندارد؛ FP32 ترافیک حافظه ضرب امتیازدهی را نصف می‌کند
+FACTOR_DTYPE = np.float32
+
+
+def _in_sorted(values: np.ndarray, sorted_ref: np.ndarray) -> np.ndarray:
+    """
+    EN: Membership test against an already-sorted array via binary search (no re-sorting as in np.isin).
+    FA: آزمون عضویت در آرایه از پیش مرتب با جستجوی دودویی (بدون مرتب‌سازی دوباره مانند np.isin).
+    """
+    if len(sorted_ref) == 0:
+        return np.zeros(len(values), dtype=bool)
+    pos = np.searchsorted(sorted_ref, values)
+    return sorted_ref[np.minimum(pos, len(sorted_ref) - 1)] == values
 
 
 class CollaborativeRecommender:
@@ -32,50 +52,110 @@ class CollaborativeRecommender:
         random_state: int = 42,
         user_mapping: Optional[Dict[str, int]] = None,
         item_mapping: Optional[Dict[str, int]] = None,
+        confidence_alpha: float = 0.0,
+        use_cg: bool = False,
+        cg_iters: int = 3,
+        device: str = "cpu",
+        use_ann: bool = False,
     ) -> None:
-        # EN: Hyperparameters and mappings
-        # FA: هایپرپارامترها و نگاشت‌ها
+        # EN: Hyperparameters and mappings; confidence_alpha > 0 weights observed entries by 1 + alpha * r
+        # FA: هایپرپارامترها و نگاشت‌ها؛ confidence_alpha > 0 ورودی‌های مشاهده‌شده را با 1 + alpha * r وزن می‌دهد
+        # EN: use_cg replaces the exact weighted per-row solve with cg_iters warm-started CG steps
+        # FA: use_cg حل دقیق وزن‌دار هر ردیف را با cg_iters گام CG با شروع گرم جایگزین می‌کند
         self.factors = factors
         self.regularization = regularization
         self.iterations = iterations
         self.random_state = random_state
+        self.confidence_alpha = confidence_alpha
+        self.use_cg = use_cg
+        self.cg_iters = cg_iters
+        # EN: "cuda" (or any torch device) trains on PyTorch; the fitted factors always live in numpy
+        # FA: "cuda" (یا هر دستگاه torch) با PyTorch آموزش می‌دهد؛ فاکتورهای نهایی همیشه numpy هستند
+        self.device = device
+        # EN: use_ann serves `recommend` from an HNSW index (hnswlib) built lazily on the item factors
+        # FA: use_ann پاسخ `recommend` را از شاخص HNSW (hnswlib) می‌دهد که به صورت تنبل روی فاکتورهای کالا ساخته می‌شود
+        self.use_ann = use_ann
+        self._ann_index = None
         self.user_mapping: Dict[str, int] = user_mapping or {}
+        self._inverse_item_cache: Optional[Dict[int, str]] = None
         self.item_mapping: Dict[str, int] = item_mapping or {}
         self.user_factors: Optional[np.ndarray] = None
         self.item_factors: Optional[np.ndarray] = None
         self._interactions: Optional[sparse.csr_matrix] = None
 
+    @property
+    def item_mapping(self) -> Dict[str, int]:
+        return self._item_mapping
+
+    @item_mapping.setter
+    def item_mapping(self, mapping: Dict[str, int]) -> None:
+        # EN: Reassigning the mapping invalidates the cached inverse (in-place edits are not tracked)
+        # FA: جایگزینی نگاشت، معکوس کش‌شده را باطل می‌کند (ویرایش درجا ردیابی نمی‌شود)
+        self._item_mapping = mapping
+        self._inverse_item_cache = None
+
+    @property
+    def _inverse_item_mapping(self) -> Dict[int, str]:
+        """
+        EN: Index -> item_id, built on first use and reused across recommend calls.
+        FA: نگاشت اندیس به شناسه کالا که در اولین استفاده ساخته و بین فراخوانی‌ها استفاده می‌شود.
+        """
+        if self._inverse_item_cache is None:
+            self._inverse_item_cache = {idx: iid for iid, idx in self._item_mapping.items()}
+        return self._inverse_item_cache
+
     @staticmethod
     def _als_step(
-        ratings: sparse.csr_matrix, fixed_vecs: np.ndarray, reg: float
+        ratings: sparse.csr_matrix,
+        fixed_vecs: np.ndarray,
+        reg: float,
+        alpha: float = 0.0,
+        cg_iters: int = 0,
+        current: Optional[np.ndarray] = None,
     ) -> np.ndarray:
         """
         Perform one ALS update step for either user or item factors.
 
-        EN: Solves normal equations for each row independently.
-        FA: معادلات نرمال را برای هر ردیف به صورت مستقل حل می‌کند.
+        EN: Uniform confidence uses one shared Cholesky solve; weighted confidence solves per row (exact or CG).
+        FA: با اطمینان یکنواخت یک حل چولسکی مشترک و با اطمینان وزن‌دار حل ردیف‌به‌ردیف (دقیق یا CG) انجام می‌شود.
         """
-        num_rows, factors = ratings.shape[0], fixed_vecs.shape[1]
-        updated = np.zeros((num_rows, factors), dtype=np.float64)
-
-        # EN: Precompute Gram matrix for stability
-        # FA: ماتریس گرم را برای پایداری پیش‌محاسبه می‌کنیم
+        factors = fixed_vecs.shape[1]
         gram = fixed_vecs.T @ fixed_vecs
-        reg_identity = reg * np.eye(factors)
-
-        for i in range(num_rows):
-            row = ratings.getrow(i)
-            if row.nnz == 0:
-                # EN: If no interactions, keep zeros
-                # FA: در صورت نبود تعامل، صفر باقی می‌ماند
-                continue
-            indices = row.indices
-            values = row.data
-            fixed_subset = fixed_vecs[indices]
-            A = gram + reg_identity
-            b = fixed_subset.T @ values
-            updated[i] = np.linalg.solve(A, b)
-        return updated
+
+        if alpha > 0:
+            # EN: Per-row systems differ, so run the CSR kernel (numba-parallel when available)
+            # FA: دستگاه هر ردیف متفاوت است؛ پس کرنل CSR اجرا می‌شود (در صورت وجود numba موازی)
+            data = ratings.data.astype(FACTOR_DTYPE, copy=False)
+            fixed = np.ascontiguousarray(fixed_vecs, dtype=FACTOR_DTYPE)
+            if cg_iters > 0 and current is not None:
+                # EN: CG refines a copy of the current factors in place
+                # FA: CG یک کپی از فاکتورهای فعلی را درجا بهبود می‌دهد
+                updated = np.array(current, dtype=FACTOR_DTYPE, order="C")
+                return als_step_cg_csr(
+                    ratings.indptr,
+                    ratings.indices,
+                    data,
+                    fixed,
+                    gram,
+                    float(reg),
+                    float(alpha),
+                    int(cg_iters),
+                    updated,
+                )
+            updated = np.empty((ratings.shape[0], factors), dtype=FACTOR_DTYPE)
+            return als_step_csr(
+                ratings.indptr, ratings.indices, data, fixed, gram, float(reg), float(alpha), updated
+            )
+
+        # EN: Every row shares A = gram + reg*I, so factor it once and solve all right-hand sides together
+        # FA: همه ردیف‌ها ماتریس A = gram + reg*I مشترک دارند؛ پس یک‌بار تجزیه و همه سمت‌راست‌ها با هم حل می‌شوند
+        A = gram + reg * np.eye(factors, dtype=gram.dtype)
+        cho = linalg.cho_factor(A)
+
+        # EN: One sparse-dense product gives b for all rows; rows without interactions get b = 0 -> zeros
+        # FA: یک ضرب تنک-چگال b همه ردیف‌ها را می‌دهد؛ ردیف‌های بدون تعامل b = 0 و در نتیجه صفر می‌گیرند
+        B = np.asarray(ratings @ fixed_vecs).T
+        return np.ascontiguousarray(linalg.cho_solve(cho, B).T, dtype=FACTOR_DTYPE)
 
     def fit(
         self,
@@ -96,7 +176,12 @@ class CollaborativeRecommender:
 
         # EN: Convert to CSR for efficient row access
         # FA: برای دسترسی سریع به ردیف‌ها، ماتریس را به CSR تبدیل می‌کنیم
-        interactions_csr = interaction_matrix.tocsr()
+        # EN: Cast the ratings to FP32 once so every ALS product runs in single precision
+        # FA: امتیازها یک‌بار به FP32 تبدیل می‌شوند تا همه ضرب‌های ALS تک‌دقتی اجرا شوند
+        interactions_csr = interaction_matrix.tocsr().astype(FACTOR_DTYPE, copy=False)
+        # EN: Sorted column indices let every row slice serve directly as a sorted exclusion list
+        # FA: اندیس‌های ستونی مرتب باعث می‌شود هر برش ردیف مستقیماً فهرست حذف مرتب باشد
+        interactions_csr.sort_indices()
         self._interactions = interactions_csr
 
         num_users, num_items = interactions_csr.shape
@@ -105,25 +190,55 @@ class CollaborativeRecommender:
         self.user_mapping = {uid: idx for uid, idx in self.user_mapping.items() if idx < num_users}
         self.item_mapping = {iid: idx for iid, idx in self.item_mapping.items() if idx < num_items}
 
+        # EN: The matrix is fixed across iterations, so transpose it once for the item step
+        # FA: ماتریس در طول تکرارها ثابت است؛ پس ترانهاده برای گام کالا یک‌بار ساخته می‌شود
+        interactions_t = interactions_csr.T.tocsr()
+
+        self._ann_index = None
         rng = np.random.default_rng(self.random_state)
-        self.user_factors = rng.normal(scale=0.01, size=(num_users, self.factors))
-        self.item_factors = rng.normal(scale=0.01, size=(num_items, self.factors))
-
-        for it in range(self.iterations):
-            # EN: Update user factors fixing item factors
-            # FA: با ثابت نگه داشتن فاکتورهای کالا، فاکتورهای کاربر را به‌روزرسانی می‌کنیم
-            self.user_factors = self._als_step(
-                interactions_csr, self.item_factors, self.regularization
-            )
-            # EN: Update item factors fixing user factors
-            # FA: با ثابت نگه داشتن فاکتورهای کاربر، فاکتورهای کالا را به‌روزرسانی می‌کنیم
-            self.item_factors = self._als_step(
-                interactions_csr.T.tocsr(), self.user_factors, self.regularization
-            )
-            print(
-                f"ALS iteration {it + 1}/{self.iterations} completed "
-                f"(users: {num_users}, items: {num_items})"
+        self.user_factors = rng.normal(scale=0.01, size=(num_users, self.factors)).astype(FACTOR_DTYPE)
+        self.item_factors = rng.normal(scale=0.01, size=(num_items, self.factors)).astype(FACTOR_DTYPE)
+
+        if self.device != "cpu":
+            # EN: GPU path keeps factors on the device for the whole fit (uniform confidence only)
+            # FA: مسیر GPU فاکتورها را در کل آموزش روی دستگاه نگه می‌دارد (فقط اطمینان یکنواخت)
+            if self.confidence_alpha > 0:
+                raise ValueError("GPU ALS supports uniform confidence only; set confidence_alpha=0.")
+            self.user_factors, self.item_factors = fit_als_torch(
+                interactions_csr,
+                interactions_t,
+                self.user_factors,
+                self.item_factors,
+                self.regularization,
+                self.iterations,
+                device=self.device,
             )
+        else:
+            for it in range(self.iterations):
+                # EN: Update user factors fixing item factors
+                # FA: با ثابت نگه داشتن فاکتورهای کالا، فاکتورهای کاربر را به‌روزرسانی می‌کنیم
+                self.user_factors = self._als_step(
+                    interactions_csr,
+                    self.item_factors,
+                    self.regularization,
+                    self.confidence_alpha,
+                    cg_iters=self.cg_iters if self.use_cg else 0,
+                    current=self.user_factors,
+                )
+                # EN: Update item factors fixing user factors
+                # FA: با ثابت نگه داشتن فاکتورهای کاربر، فاکتورهای کالا را به‌روزرسانی می‌کنیم
+                self.item_factors = self._als_step(
+                    interactions_t,
+                    self.user_factors,
+                    self.regularization,
+                    self.confidence_alpha,
+                    cg_iters=self.cg_iters if self.use_cg else 0,
+                    current=self.item_factors,
+                )
+                print(
+                    f"ALS iteration {it + 1}/{self.iterations} completed "
+                    f"(users: {num_users}, items: {num_items})"
+                )
 
         print(
             f"Trained CF model | users: {num_users:,}, items: {num_items:,}, "
@@ -142,15 +257,16 @@ class CollaborativeRecommender:
             raise ValueError(f"Unknown user_id: {user_id}")
         return self.user_mapping[user_id]
 
-    def _item_ids_from_indices(self, indices: Iterable[int]) -> List[str]:
+    def _to_recommendations(self, indices: np.ndarray, scores: np.ndarray) -> Recommendations:
         """
-        Convert item indices back to original IDs.
-
-        EN: Reverse mapping for returning human-readable IDs.
-        FA: نگاشت معکوس برای برگرداندن شناسه‌های قابل فهم انسان.
+        EN: Map ranked indices to item IDs, dropping unmapped indices together with their scores.
+        FA: اندیس‌های رتبه‌بندی‌شده را به شناسه کالا نگاشت داده و اندیس‌های بدون نگاشت را همراه امتیازشان حذف می‌کند.
         """
-        inverse_map = {idx: iid for iid, idx in self.item_mapping.items()}
-        return [inverse_map[i] for i in indices if i in inverse_map]
+        inverse_map = self._inverse_item_mapping
+        keep = [pos for pos, i in enumerate(indices.tolist()) if i in inverse_map]
+        kept_indices = indices[keep]
+        item_ids = np.array([inverse_map[i] for i in kept_indices.tolist()], dtype=object)
+        return Recommendations(item_ids, scores[keep], kept_indices)
 
     def recommend(
         self, user_id: str, top_k: int = 10, exclude_interacted: bool = True
@@ -161,59 +277,190 @@ class CollaborativeRecommender:
         EN: Computes dot-product scores and returns item_ids with scores.
         FA: امتیاز حاصل از ضرب داخلی را محاسبه کرده و شناسه کالاها را همراه با امتیاز برمی‌گرداند.
         """
+        return self.recommend_arrays(user_id, top_k, exclude_interacted).to_list()
+
+    def recommend_arrays(
+        self, user_id: str, top_k: int = 10, exclude_interacted: bool = True
+    ) -> Recommendations:
+        """
+        Recommend top-K items as parallel ID/score arrays.
+
+        EN: Same ranking as `recommend`, without building per-item tuples; used by the hybrid blend.
+        FA: همان رتبه‌بندی `recommend` بدون ساخت تاپل برای هر کالا؛ در ترکیب هایبرید استفاده می‌شود.
+        """
         if self.user_factors is None or self.item_factors is None:
             raise RuntimeError("Model not trained. Call fit() first.")
         user_idx = self._user_index(user_id)
 
         user_vector = self.user_factors[user_idx]
-        scores = self.item_factors @ user_vector
-
+        interacted_items = np.empty(0, dtype=np.int32)
         # EN: Optionally remove items the user has already interacted with
         # FA: در صورت نیاز اقلامی که کاربر قبلاً تعامل داشته حذف می‌شود
         if exclude_interacted and self._interactions is not None:
-            interacted_items = self._interactions[user_idx].indices
-            scores[interacted_items] = -np.inf
+            # EN: Slice the CSR row directly instead of building a 1xN matrix
+            # FA: ردیف CSR مستقیماً برش داده می‌شود به‌جای ساخت ماتریس 1xN
+            indptr = self._interactions.indptr
+            interacted_items = self._interactions.indices[indptr[user_idx] : indptr[user_idx + 1]]
+
+        if self.use_ann:
+            # EN: Over-fetch by the number of seen items so filtering still leaves top_k candidates
+            # FA: به تعداد اقلام دیده‌شده بیشتر واکشی می‌شود تا پس از فیلتر هنوز top_k نامزد بماند
+            if self._ann_index is None:
+                self._ann_index = build_hnsw_index(self.item_factors)
+            labels = query_hnsw_index(self._ann_index, user_vector, top_k + len(interacted_items))
+            labels = labels[~_in_sorted(labels, interacted_items)]
+            # EN: Re-score candidates exactly so returned scores match the brute-force path
+            # FA: امتیاز نامزدها دقیق بازمحاسبه می‌شود تا با مسیر کامل یکسان باشد
+            cand_scores = self.item_factors[labels] @ user_vector
+            order = np.argsort(-cand_scores, kind="stable")[:top_k]
+            return self._to_recommendations(labels[order], cand_scores[order])
+
+        if NUMBA_AVAILABLE:
+            # EN: Fused kernel: score, skip seen items and keep a K-heap without materialising all scores
+            # FA: کرنل ادغام‌شده: امتیازدهی، رد اقلام دیده‌شده و نگه‌داری هیپ K بدون ساخت کل بردار امتیاز
+            top_sorted, top_scores = topk_score_exclude(
+                self.item_factors, user_vector, interacted_items, top_k
+            )
+            return self._to_recommendations(top_sorted, top_scores)
+
+        scores = self.item_factors @ user_vector
+        scores[interacted_items] = -np.inf
 
         top_indices = np.argpartition(-scores, kth=min(top_k, len(scores) - 1))[:top_k]
         top_sorted = top_indices[np.argsort(-scores[top_indices])]
-        top_item_ids = self._item_ids_from_indices(top_sorted)
-        top_scores = scores[top_sorted]
-        return list(zip(top_item_ids, top_scores.tolist()))
+        return self._to_recommendations(top_sorted, scores[top_sorted])
+
+    def _batch_top_k(
+        self,
+        user_ids: Iterable[str],
+        top_k: int,
+        exclude_interacted: bool,
+        batch_size: int,
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        EN: Yield (top indices, top scores) blocks of shape (block, top_k), one GEMM per block.
+        FA: بلوک‌های (اندیس‌های برتر، امتیازهای برتر) با شکل (بلوک، top_k) را با یک ضرب ماتریسی برای هر بلوک تولید می‌کند.
+        """
+        if self.user_factors is None or self.item_factors is None:
+            raise RuntimeError("Model not trained. Call fit() first.")
+        user_indices = np.asarray([self._user_index(uid) for uid in user_ids], dtype=np.int64)
+        num_items = self.item_factors.shape[0]
+        kth = min(top_k, num_items - 1)
+
+        for start in range(0, len(user_indices), batch_size):
+            block = user_indices[start : start + batch_size]
+            scores = self.user_factors[block] @ self.item_factors.T
+
+            # EN: Mask interacted items for the whole block via the CSR row slice
+            # FA: اقلام تعامل‌شده برای کل بلوک از طریق برش سطری CSR پوشانده می‌شوند
+            if exclude_interacted and self._interactions is not None:
+                seen = self._interactions[block]
+                seen_rows = np.repeat(np.arange(len(block)), np.diff(seen.indptr))
+                scores[seen_rows, seen.indices] = -np.inf
+
+            top_indices = np.argpartition(-scores, kth=kth, axis=1)[:, :top_k]
+            top_scores = np.take_along_axis(scores, top_indices, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            yield (
+                np.take_along_axis(top_indices, order, axis=1),
+                np.take_along_axis(top_scores, order, axis=1),
+            )
+
+    def recommend_batch(
+        self,
+        user_ids: Iterable[str],
+        top_k: int = 10,
+        exclude_interacted: bool = True,
+        batch_size: int = 1024,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Recommend top-K items for many users at once.
+
+        EN: Scores users in blocks with one matrix product and a row-wise top-K selection.
+        FA: کاربران را در بلوک‌هایی با یک ضرب ماتریسی و انتخاب K برتر سطری امتیازدهی می‌کند.
+        """
+        inverse_map = self._inverse_item_mapping
+        results: List[List[Tuple[str, float]]] = []
+        for top_sorted, top_scores in self._batch_top_k(user_ids, top_k, exclude_interacted, batch_size):
+            for row_indices, row_scores in zip(top_sorted.tolist(), top_scores.tolist()):
+                results.append(
+                    [
+                        (inverse_map[i], score)
+                        for i, score in zip(row_indices, row_scores)
+                        if i in inverse_map
+                    ]
+                )
+        return results
+
+    def recommend_batch_arrays(
+        self,
+        user_ids: Iterable[str],
+        top_k: int = 10,
+        exclude_interacted: bool = True,
+        batch_size: int = 1024,
+    ) -> List[Recommendations]:
+        """
+        Recommend top-K items for many users as parallel ID/score arrays.
+
+        EN: Same ranking as `recommend_batch`, one `Recommendations` per user; used by the hybrid batch path.
+        FA: همان رتبه‌بندی `recommend_batch` با یک `Recommendations` برای هر کاربر؛ در مسیر دسته‌ای هایبرید استفاده می‌شود.
+        """
+        results: List[Recommendations] = []
+        for top_sorted, top_scores in self._batch_top_k(user_ids, top_k, exclude_interacted, batch_size):
+            results.extend(
+                self._to_recommendations(row_indices, row_scores)
+                for row_indices, row_scores in zip(top_sorted, top_scores)
+            )
+        return results
 
     def save(self, path: Path | str) -> None:
         """
         Save model factors and metadata.
 
-        EN: Stores factors in NPZ and mappings in pickle alongside.
-        FA: فاکتورها را در NPZ و نگاشت‌ها را در پیکل ذخیره می‌کند.
+        EN: Stores hyperparameters in NPZ, factors as raw NPY files (memory-mappable) and mappings in JSON alongside.
+        FA: ابرپارامترها را در NPZ، فاکتورها را به صورت فایل‌های NPY خام (قابل نگاشت حافظه) و نگاشت‌ها را در JSON ذخیره می‌کند.
         """
         target = Path(path)
         ensure_dir(target.parent)
-        np.savez_compressed(
+        np.save(target.with_suffix(".user_factors.npy"), self.user_factors, allow_pickle=False)
+        np.save(target.with_suffix(".item_factors.npy"), self.item_factors, allow_pickle=False)
+        np.savez(
             target,
-            user_factors=self.user_factors,
-            item_factors=self.item_factors,
             factors=self.factors,
             regularization=self.regularization,
             iterations=self.iterations,
             random_state=self.random_state,
+            confidence_alpha=self.confidence_alpha,
+            use_cg=self.use_cg,
+            cg_iters=self.cg_iters,
+            use_ann=self.use_ann,
         )
-        save_pickle(
+        save_json(
             {"user_mapping": self.user_mapping, "item_mapping": self.item_mapping},
-            target.with_suffix(".mappings.pkl"),
+            target.with_suffix(".mappings.json"),
         )
 
     @classmethod
-    def load(cls, path: Path | str) -> "CollaborativeRecommender":
+    def load(
+        cls, path: Path | str, interactions: Optional[sparse.csr_matrix] = None
+    ) -> "CollaborativeRecommender":
         """
         Load model from disk.
 
-        EN: Restores factors and mappings.
-        FA: فاکتورها و نگاشت‌ها را از دیسک بازیابی می‌کند.
+        EN: Restores factors (memory-mapped, so only touched rows are paged in) and mappings; pass the
+            training `interactions` to keep excluding already-seen items as a freshly fitted model does.
+        FA: فاکتورها (با نگاشت حافظه، تا فقط ردیف‌های استفاده‌شده بارگذاری شوند) و نگاشت‌ها را بازیابی می‌کند؛
+            با دادن `interactions` آموزشی، حذف اقلام دیده‌شده مانند مدل تازه آموزش‌دیده حفظ می‌شود.
         """
         target = Path(path)
-        data = np.load(target, allow_pickle=True)
-        mappings = load_pickle(target.with_suffix(".mappings.pkl"))
+        data = np.load(target, allow_pickle=False)
+        mappings_path = target.with_suffix(".mappings.json")
+        if mappings_path.exists():
+            mappings = load_json(mappings_path)
+        else:
+            # EN: Fall back to mappings pickled by older versions
+            # FA: بازگشت به نگاشت‌های pickle شده نسخه‌های قدیمی
+            mappings = load_mapping_pickle(target.with_suffix(".mappings.pkl"))
 
         model = cls(
             factors=int(data["factors"]),
@@ -222,9 +469,24 @@ class CollaborativeRecommender:
             random_state=int(data["random_state"]),
             user_mapping=mappings.get("user_mapping", {}),
             item_mapping=mappings.get("item_mapping", {}),
+            confidence_alpha=float(data["confidence_alpha"]) if "confidence_alpha" in data else 0.0,
+            use_cg=bool(data["use_cg"]) if "use_cg" in data else False,
+            cg_iters=int(data["cg_iters"]) if "cg_iters" in data else 3,
+            use_ann=bool(data["use_ann"]) if "use_ann" in data else False,
         )
-        model.user_factors = data["user_factors"]
-        model.item_factors = data["item_factors"]
+        user_path = target.with_suffix(".user_factors.npy")
+        item_path = target.with_suffix(".item_factors.npy")
+        if user_path.exists() and item_path.exists():
+            model.user_factors = np.load(user_path, mmap_mode="r")
+            model.item_factors = np.load(item_path, mmap_mode="r")
+        else:
+            # EN: Older artifacts kept FP64 factors inside the compressed NPZ; normalise them on load
+            # FA: آرتیفکت‌های قدیمی فاکتورهای FP64 را داخل NPZ فشرده نگه می‌داشتند؛ هنگام بارگذاری یکسان می‌شوند
+            model.user_factors = data["user_factors"].astype(FACTOR_DTYPE, copy=False)
+            model.item_factors = data["item_factors"].astype(FACTOR_DTYPE, copy=False)
+        if interactions is not None:
+            model._interactions = interactions.tocsr().astype(FACTOR_DTYPE, copy=False)
+            model._interactions.sort_indices()
         return model
 
 
@@ -232,11 +494,11 @@ def load_processed_mappings(project_root: Path | None = None) -> Tuple[Dict[str,
     """
     Helper to load user/item mappings from processed artifacts.
 
-    EN: Reads pickled mappings produced in Phase 1 preprocessing.
+    EN: Reads the ID arrays (or legacy pickled mappings) produced in Phase 1 preprocessing.
     FA: نگاشت‌های کاربر/کالا تولید شده در پیش‌پردازش فاز اول را بارگذاری می‌کند.
     """
     root = project_root or Path(__file__).resolve().parents[2]
     processed = root / "data" / "processed"
-    user_mapping = load_pickle(processed / "user_mapping.pkl")
-    item_mapping = load_pickle(processed / "item_mapping.pkl")
+    user_mapping = load_id_mapping(processed, "user")
+    item_mapping = load_id_mapping(processed, "item")
     return user_mapping, item_mapping
@@ -7,17 +7,40 @@ FA: با استفاده از ویژگی‌های اقلام، ماتریس TF-ID
 
 from __future__ import annotations
 
+from itertools import chain
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 from scipy import sparse
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 
+from src.models.recommendations import Recommendations
 from src.utils.io import ensure_dir, save_pickle, load_pickle
 
 
+def _pre_analyzed(doc: List[str]) -> List[str]:
+    """
+    EN: Identity analyzer for documents that are already lists of terms (module-level so it pickles).
+    FA: تحلیل‌گر همانی برای اسنادی که از قبل فهرست واژه‌اند (در سطح ماژول تا قابل pickle باشد).
+    """
+    return doc
+
+
+def _word_ngrams(tokens: List[str], min_n: int, max_n: int) -> List[str]:
+    """
+    EN: Word n-grams of a token list, matching TfidfVectorizer's word analyzer.
+    FA: n-gramهای کلمه‌ای یک فهرست توکن، مطابق تحلیل‌گر کلمه TfidfVectorizer.
+    """
+    if max_n == 1:
+        return tokens
+    terms = list(tokens) if min_n == 1 else []
+    for n in range(max(min_n, 2), max_n + 1):
+        terms.extend(" ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1))
+    return terms
+
+
 class ContentBasedRecommender:
     """
     Content-based recommender using TF-IDF item representations.
@@ -26,12 +49,17 @@ class ContentBasedRecommender:
     FA: هر کالا را با بردار TF-IDF ساخته‌شده از ویژگی‌هایش نمایش می‌دهد.
     """
 
+    # EN: Item-property columns the model reads; loaders project to these
+    # FA: ستون‌های ویژگی کالا که مدل می‌خواند؛ بارگذارها فقط همین‌ها را می‌خوانند
+    needed_cols: Tuple[str, ...] = ("itemid", "property", "value")
+
     def __init__(
         self,
         max_features: int = 5000,
         ngram_range: Tuple[int, int] = (1, 2),
         min_df: int = 2,
         stop_words: Optional[str] = "english",
+        use_hashing: bool = False,
     ) -> None:
         # EN: Hyperparameters for TF-IDF
         # FA: هایپرپارامترهای TF-IDF
@@ -39,39 +67,73 @@ class ContentBasedRecommender:
         self.ngram_range = ngram_range
         self.min_df = min_df
         self.stop_words = stop_words
+        # EN: Hash terms into max_features L2-normalized TF columns instead of fitting a vocabulary and IDF
+        #     (single pass, no term dict; min_df does not apply)
+        # FA: واژه‌ها به جای ساخت واژگان و IDF در max_features ستون TF نرمال‌شده L2 هش می‌شوند
+        #     (یک گذر، بدون دیکشنری واژه؛ min_df اعمال نمی‌شود)
+        self.use_hashing = use_hashing
 
-        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.vectorizer: Optional[TfidfVectorizer | HashingVectorizer] = None
         self.item_features: Optional[sparse.csr_matrix] = None
         self.item_ids: List[str] = []
         self.item_index: Dict[str, int] = {}
+        # EN: Row L2 norms of item_features, computed once since features are immutable after fit
+        # FA: نُرم L2 سطرهای item_features که چون پس از آموزش تغییر نمی‌کند یک‌بار محاسبه می‌شود
+        self._item_norms: Optional[np.ndarray] = None
+        # EN: Optional (neighbour indices, scores) table of shape (items, k) from precompute_similar()
+        # FA: جدول اختیاری (اندیس همسایه‌ها، امتیازها) با شکل (کالاها، k) از precompute_similar()
+        self._similar_table: Optional[Tuple[np.ndarray, np.ndarray]] = None
 
     @staticmethod
-    def _build_item_corpus(df: pd.DataFrame) -> Tuple[List[str], List[str]]:
+    def _build_item_corpus(
+        df: pd.DataFrame, word_vectorizer: TfidfVectorizer
+    ) -> Tuple[List[str], List[List[str]]]:
         """
-        Build corpus strings per item from properties.
+        Build pre-analyzed term lists per item from properties.
 
-        EN: Combines property name and value into a text blob per item.
-        FA: نام ویژگی و مقدار آن را برای هر کالا در یک متن ترکیب می‌کند.
+        EN: Tokenizes each distinct "property value" text once and concatenates tokens per item,
+            producing the same terms as the word analyzer on the joined text without building it.
+        FA: هر متن یکتای «ویژگی مقدار» یک‌بار توکن‌سازی و توکن‌های هر کالا به هم متصل می‌شوند؛
+            همان واژه‌های تحلیل‌گر کلمه روی متن الحاقی بدون ساخت آن متن تولید می‌شود.
         """
-        required_cols = {"itemid", "property", "value"}
-        missing = required_cols - set(df.columns)
+        missing = set(ContentBasedRecommender.needed_cols) - set(df.columns)
         if missing:
             raise ValueError(f"Missing required columns for content model: {missing}")
-        df = df.copy()
-        df["itemid"] = df["itemid"].astype("string")
         # EN: Concatenate property and value as tokens
         # FA: ویژگی و مقدار را به صورت کلمه به کلمه به هم می‌چسبانیم
-        df["property_text"] = (
+        property_text = (
             df["property"].astype("string").fillna("")
             + " "
             + df["value"].astype("string").fillna("")
         )
-        grouped = df.groupby("itemid")["property_text"].apply(
-            lambda vals: " ".join(vals)
-        )
-        item_ids = grouped.index.tolist()
-        corpus = grouped.tolist()
-        return item_ids, corpus
+        text_codes, unique_texts = pd.factorize(property_text)
+        item_codes, item_ids = pd.factorize(df["itemid"].astype("string"), sort=True)
+        # EN: Rows without an itemid are dropped, as groupby did
+        # FA: ردیف‌های بدون itemid مانند groupby کنار گذاشته می‌شوند
+        known = item_codes >= 0
+        text_codes, item_codes = text_codes[known], item_codes[known]
+
+        # EN: Property texts repeat heavily across items, so analyze each distinct one only once
+        # FA: متن ویژگی‌ها بین کالاها بسیار تکرار می‌شود؛ پس هر متن یکتا فقط یک‌بار تحلیل می‌شود
+        preprocess = word_vectorizer.build_preprocessor()
+        tokenize = word_vectorizer.build_tokenizer()
+        stop_words = word_vectorizer.get_stop_words() or frozenset()
+        unique_tokens = [
+            [tok for tok in tokenize(preprocess(text)) if tok not in stop_words]
+            for text in unique_texts.tolist()
+        ]
+
+        # EN: Rows grouped by item in original order (same order the groupby-join used)
+        # FA: ردیف‌ها به ترتیب اصلی بر اساس کالا گروه‌بندی می‌شوند (همان ترتیب groupby-join)
+        order = np.argsort(item_codes, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(item_codes, minlength=len(item_ids)))))
+        sorted_codes = text_codes[order].tolist()
+        min_n, max_n = word_vectorizer.ngram_range
+        corpus: List[List[str]] = []
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            tokens = list(chain.from_iterable(unique_tokens[c] for c in sorted_codes[start:end]))
+            corpus.append(_word_ngrams(tokens, min_n, max_n))
+        return item_ids.tolist(), corpus
 
     def fit(self, item_properties_df: pd.DataFrame) -> "ContentBasedRecommender":
         """
@@ -80,26 +142,52 @@ class ContentBasedRecommender:
         EN: Builds the vectorizer and sparse item-feature matrix.
         FA: بردارساز و ماتریس ویژگی‌های کالا را ایجاد می‌کند.
         """
-        item_ids, corpus = self._build_item_corpus(item_properties_df)
-        self.vectorizer = TfidfVectorizer(
-            max_features=self.max_features,
+        word_vectorizer = TfidfVectorizer(
             ngram_range=self.ngram_range,
-            min_df=self.min_df,
             stop_words=self.stop_words,
         )
+        item_ids, corpus = self._build_item_corpus(item_properties_df, word_vectorizer)
+        # EN: Documents are already analyzed, so the vectorizer only counts and weights terms
+        # FA: اسناد از قبل تحلیل شده‌اند؛ پس بردارساز فقط واژه‌ها را شمارش و وزن‌دهی می‌کند
+        if self.use_hashing:
+            self.vectorizer = HashingVectorizer(
+                n_features=self.max_features,
+                analyzer=_pre_analyzed,
+                alternate_sign=False,
+                norm="l2",
+            )
+        else:
+            self.vectorizer = TfidfVectorizer(
+                max_features=self.max_features,
+                min_df=self.min_df,
+                analyzer=_pre_analyzed,
+            )
         # EN: Fit and transform corpus into sparse matrix
         # FA: بدست آوردن ماتریس تنک از روی کورپوس
         self.item_features = self.vectorizer.fit_transform(corpus).tocsr()
+        self._similar_table = None
         self.item_ids = item_ids
         self.item_index = {iid: idx for idx, iid in enumerate(item_ids)}
+        self._item_norms = self._compute_item_norms(self.item_features)
 
         print(
             f"Fitted content model for {len(self.item_ids):,} items "
             f"with {self.item_features.shape[1]:,} features. "
-            f"(max_features={self.max_features}, ngram_range={self.ngram_range}, min_df={self.min_df})"
+            f"(max_features={self.max_features}, ngram_range={self.ngram_range}, min_df={self.min_df}, "
+            f"use_hashing={self.use_hashing})"
         )
         return self
 
+    @staticmethod
+    def _compute_item_norms(item_features: sparse.csr_matrix) -> np.ndarray:
+        """
+        Compute per-item L2 norms.
+
+        EN: Row-wise sparse norm, evaluated once per fit/load instead of on every call.
+        FA: نُرم تنک سطری که به‌جای هر فراخوانی، یک‌بار در آموزش/بارگذاری محاسبه می‌شود.
+        """
+        return np.asarray(sparse.linalg.norm(item_features, axis=1)).ravel()
+
     def _vector_for_item(self, item_id: str) -> sparse.csr_matrix:
         """
         Get TF-IDF vector for a specific item.
@@ -121,22 +209,110 @@ class ContentBasedRecommender:
         EN: Uses TF-IDF cosine similarity to rank items.
         FA: با استفاده از شباهت کسینوسی بر اساس TF-IDF اقلام مشابه را رتبه‌بندی می‌کند.
         """
+        return self.similar_items_arrays(item_id, top_k).to_list()
+
+    def _rank_similar(
+        self, nz_idx: np.ndarray, nz_vals: np.ndarray, query_idx: int, top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank one query's nonzero similarities into a top-K list.
+
+        EN: Ties break by lower item index, so a shorter list is always a prefix of a longer one
+            (which the precomputed table relies on); zero-similarity items backfill in index order.
+        FA: در امتیاز برابر اندیس کوچک‌تر مقدم است تا فهرست کوتاه‌تر همیشه پیشوند فهرست بلندتر باشد
+            (جدول از پیش محاسبه‌شده به این وابسته است)؛ اقلام با شباهت صفر به ترتیب اندیس تکمیل می‌شوند.
+        """
+        keep = nz_idx != query_idx  # EN/FA: حذف همان آیتم از نتایج
+        nz_idx, nz_vals = nz_idx[keep], nz_vals[keep]
+        top_k = max(top_k, 0)
+        cand_idx, cand_vals = nz_idx, nz_vals
+        if len(nz_vals) > top_k:
+            # EN: Keep everything scoring at least the K-th best value, so boundary ties are all considered
+            # FA: همه مواردی که حداقل برابر K-امین بهترین امتیازند نگه داشته می‌شوند تا همه تساوی‌های مرزی بررسی شوند
+            if top_k == 0:
+                cand = np.empty(0, dtype=np.intp)
+            else:
+                threshold = np.partition(nz_vals, len(nz_vals) - top_k)[len(nz_vals) - top_k]
+                cand = np.flatnonzero(nz_vals >= threshold)
+            cand_idx, cand_vals = nz_idx[cand], nz_vals[cand]
+        order = np.lexsort((cand_idx, -cand_vals))[:top_k]
+        top_indices, top_scores = cand_idx[order], cand_vals[order].astype(np.float64)
+
+        # EN: Backfill with zero-similarity items (lowest index first) when too few items overlap
+        # FA: اگر اقلام هم‌پوشان کم باشند، با اقلام دارای شباهت صفر (از کوچک‌ترین اندیس) تکمیل می‌شود
+        missing = min(top_k, len(self.item_ids) - 1) - len(top_indices)
+        if missing > 0:
+            taken = np.append(nz_idx, query_idx)
+            fill = np.setdiff1d(np.arange(missing + len(taken)), taken)[:missing]
+            top_indices = np.concatenate([top_indices, fill])
+            top_scores = np.concatenate([top_scores, np.zeros(len(fill))])
+        return top_indices, top_scores
+
+    def precompute_similar(self, k: int = 50, block_size: int = 1024) -> "ContentBasedRecommender":
+        """
+        Precompute every item's top-k similar items.
+
+        EN: Computes X @ X.T in row blocks (with sparse_dot_mkl's multithreaded product when installed)
+            and keeps only k neighbours per item; `similar_items` then slices this table for top_k <= k.
+        FA: X @ X.T را در بلوک‌های سطری (در صورت نصب، با ضرب چندنخی sparse_dot_mkl) محاسبه و فقط k همسایه
+            برای هر کالا نگه می‌دارد؛ سپس `similar_items` برای top_k <= k از این جدول برش می‌زند.
+        """
         if self.item_features is None:
             raise RuntimeError("Model not fitted. Call fit() first.")
-        query_vec = self._vector_for_item(item_id)
-        # EN: Cosine similarity via dot product (vectors are L2-normalized by TF-IDF)
-        # FA: شباهت کسینوسی با ضرب نقطه‌ای (بردارها توسط TF-IDF نرمال شده‌اند)
-        sims = self.item_features @ query_vec.T
-        sims = np.asarray(sims.todense()).ravel()
+        try:
+            from sparse_dot_mkl import dot_product_mkl as matmul
+        except ImportError:  # pragma: no cover - MKL is optional
+            matmul = lambda a, b: a @ b  # noqa: E731
 
+        num_items = self.item_features.shape[0]
+        width = min(k, max(num_items - 1, 0))
+        neighbours = np.full((num_items, width), -1, dtype=np.int64)
+        scores = np.zeros((num_items, width), dtype=np.float64)
+        # EN: Transient row-major transpose for the block products; released when this call returns
+        # FA: ترانهاده سطری موقت برای ضرب‌های بلوکی که با پایان این فراخوانی آزاد می‌شود
+        features_t = self.item_features.T.tocsr()
+        for start in range(0, num_items, block_size):
+            block = matmul(self.item_features[start : start + block_size], features_t).tocsr()
+            block.sort_indices()
+            for row in range(block.shape[0]):
+                lo, hi = block.indptr[row], block.indptr[row + 1]
+                top_indices, top_scores = self._rank_similar(
+                    block.indices[lo:hi], block.data[lo:hi], start + row, width
+                )
+                neighbours[start + row, : len(top_indices)] = top_indices
+                scores[start + row, : len(top_scores)] = top_scores
+        self._similar_table = (neighbours, scores)
+        return self
+
+    def similar_items_arrays(self, item_id: str, top_k: int = 10) -> Recommendations:
+        """
+        Return top-K similar items as parallel ID/score arrays.
+
+        EN: Same ranking as `similar_items`, without building per-item tuples.
+        FA: همان رتبه‌بندی `similar_items` بدون ساخت تاپل برای هر کالا.
+        """
+        if self.item_features is None:
+            raise RuntimeError("Model not fitted. Call fit() first.")
+        query_vec = self._vector_for_item(item_id)
         query_idx = self.item_index[item_id]
-        sims[query_idx] = -np.inf  # EN/FA: حذف همان آیتم از نتایج
+        if self._similar_table is not None and top_k <= self._similar_table[0].shape[1]:
+            # EN: Served from the precomputed table: a row slice, no sparse product
+            # FA: از جدول از پیش محاسبه‌شده: یک برش سطری، بدون ضرب تنک
+            neighbours, scores = self._similar_table
+            width = max(min(top_k, len(self.item_ids) - 1), 0)
+            top_indices = neighbours[query_idx, :width]
+            top_scores = scores[query_idx, :width]
+        else:
+            # EN: Cosine similarity via dot product (vectors are L2-normalized by TF-IDF)
+            # FA: شباهت کسینوسی با ضرب نقطه‌ای (بردارها توسط TF-IDF نرمال شده‌اند)
+            # EN: Keep the result sparse; only items sharing a term with the query can score above zero
+            # FA: نتیجه تنک می‌ماند؛ فقط اقلامی که با پرس‌وجو واژه مشترک دارند امتیاز بیشتر از صفر می‌گیرند
+            sims = (self.item_features @ query_vec.T).tocsc()
+            sims.sort_indices()
+            top_indices, top_scores = self._rank_similar(sims.indices, sims.data, query_idx, top_k)
 
-        top_indices = np.argpartition(-sims, kth=min(top_k, len(sims) - 1))[:top_k]
-        top_sorted = top_indices[np.argsort(-sims[top_indices])]
-        top_scores = sims[top_sorted]
-        top_item_ids = [self.item_ids[i] for i in top_sorted]
-        return list(zip(top_item_ids, top_scores.tolist()))
+        top_item_ids = np.array([self.item_ids[i] for i in top_indices.tolist()], dtype=object)
+        return Recommendations(top_item_ids, top_scores, top_indices)
 
     def top_items_by_norm(self, top_k: int = 10) -> List[Tuple[str, float]]:
         """
@@ -147,8 +323,9 @@ class ContentBasedRecommender:
         """
         if self.item_features is None:
             raise RuntimeError("Model not fitted. Call fit() first.")
-        norms = sparse.linalg.norm(self.item_features, axis=1)
-        norms = np.asarray(norms).ravel()
+        if self._item_norms is None:
+            self._item_norms = self._compute_item_norms(self.item_features)
+        norms = self._item_norms
         top_indices = np.argpartition(-norms, kth=min(top_k, len(norms) - 1))[:top_k]
         top_sorted = top_indices[np.argsort(-norms[top_indices])]
         return [(self.item_ids[i], float(norms[i])) for i in top_sorted]
@@ -174,11 +351,13 @@ class ContentBasedRecommender:
                 "vectorizer": self.vectorizer,
                 "item_ids": self.item_ids,
                 "item_index": self.item_index,
+                "item_norms": self._item_norms,
                 "params": {
                     "max_features": self.max_features,
                     "ngram_range": self.ngram_range,
                     "min_df": self.min_df,
                     "stop_words": self.stop_words,
+                    "use_hashing": self.use_hashing,
                 },
             },
             vectorizer_path,
@@ -198,4 +377,7 @@ class ContentBasedRecommender:
         model.item_ids = meta["item_ids"]
         model.item_index = meta["item_index"]
         model.item_features = sparse.load_npz(features_path).tocsr()
+        model._item_norms = meta.get("item_norms")
+        if model._item_norms is None:
+            model._item_norms = cls._compute_item_norms(model.item_features)
         return model
@@ -15,6 +15,7 @@ from scipy import sparse
 
 from src.models.collaborative import CollaborativeRecommender
 from src.models.content_based import ContentBasedRecommender
+from src.models.recommendations import Recommendations
 from src.utils.io import ensure_dir, save_pickle, load_pickle
 
 
@@ -43,9 +44,94 @@ class HybridRecommender:
         self.alpha = alpha
         self.interactions = interactions
         self.user_mapping = user_mapping or getattr(model_cf, "user_mapping", {})
+        self._inverse_item_cache: Optional[Dict[int, str]] = None
+        self._content_rows_cache: Optional[np.ndarray] = None
+        # EN: CF item mapping last checked for index compatibility, and the result of that check
+        # FA: نگاشت کالای CF که آخرین بار از نظر سازگاری اندیس بررسی شد و نتیجه آن بررسی
+        self._cf_mapping_checked: Optional[Dict[str, int]] = None
+        self._cf_indices_shared = False
         self.item_mapping = item_mapping or getattr(model_cf, "item_mapping", {})
         self.filter_seen = filter_seen
 
+    @property
+    def item_mapping(self) -> Dict[str, int]:
+        return self._item_mapping
+
+    @item_mapping.setter
+    def item_mapping(self, mapping: Dict[str, int]) -> None:
+        # EN: Reassigning the mapping invalidates the cached inverse
+        # FA: جایگزینی نگاشت، معکوس کش‌شده را باطل می‌کند
+        self._item_mapping = mapping
+        self._inverse_item_cache = None
+        self._content_rows_cache = None
+        self._cf_mapping_checked = None
+
+    @property
+    def _inverse_item_mapping(self) -> Dict[int, str]:
+        """
+        EN: Index -> item_id, built on first use instead of on every history lookup.
+        FA: نگاشت اندیس به شناسه کالا که به‌جای هر بار جستجوی سابقه، در اولین استفاده ساخته می‌شود.
+        """
+        if self._inverse_item_cache is None:
+            self._inverse_item_cache = {idx: iid for iid, idx in self._item_mapping.items()}
+        return self._inverse_item_cache
+
+    @property
+    def _content_rows(self) -> np.ndarray:
+        """
+        EN: Item index -> content feature row (-1 if unmapped or without features), built on first use.
+        FA: نگاشت اندیس کالا به سطر ویژگی محتوایی (۱- اگر نگاشت یا ویژگی نداشته باشد) که در اولین استفاده ساخته می‌شود.
+        """
+        if self._content_rows_cache is None:
+            num_items = max(self._item_mapping.values(), default=-1) + 1
+            if self.interactions is not None:
+                num_items = max(num_items, self.interactions.shape[1])
+            rows = np.full(num_items, -1, dtype=np.int64)
+            idx_map = self.model_content.item_index
+            for iid, idx in self._item_mapping.items():
+                rows[idx] = idx_map.get(iid, -1)
+            self._content_rows_cache = rows
+        return self._content_rows_cache
+
+    def _candidate_indices(self, cf_recs: Recommendations) -> np.ndarray:
+        """
+        Item indices for CF candidates in this model's index space.
+
+        EN: Reuses the indices CF already computed when its mapping agrees with ours (checked once
+            per mapping pair); otherwise maps the IDs back through `item_mapping`.
+        FA: اگر نگاشت CF با نگاشت این مدل سازگار باشد (یک‌بار برای هر جفت نگاشت بررسی می‌شود) از اندیس‌های
+            محاسبه‌شده CF استفاده می‌کند؛ وگرنه شناسه‌ها از طریق `item_mapping` به اندیس برگردانده می‌شوند.
+        """
+        cf_mapping = self.model_cf.item_mapping
+        if self._cf_mapping_checked is not cf_mapping:
+            item_mapping = self._item_mapping
+            self._cf_indices_shared = all(
+                item_mapping.get(iid) == idx for iid, idx in cf_mapping.items()
+            )
+            self._cf_mapping_checked = cf_mapping
+        if self._cf_indices_shared and cf_recs.item_indices is not None:
+            return cf_recs.item_indices.astype(np.int64, copy=False)
+
+        item_mapping = self._item_mapping
+        return np.fromiter(
+            (item_mapping.get(iid, -1) for iid in cf_recs.item_ids.tolist()),
+            dtype=np.int64,
+            count=len(cf_recs.item_ids),
+        )
+
+    def _user_history_indices(self, user_id: str) -> np.ndarray:
+        """
+        Retrieve raw item indices a user has interacted with.
+
+        EN: A view of the user's CSR row; no conversion to item IDs.
+        FA: نمایی از ردیف CSR کاربر؛ بدون تبدیل به شناسه کالا.
+        """
+        if self.interactions is None or user_id not in self.user_mapping:
+            return np.empty(0, dtype=np.int64)
+        user_idx = self.user_mapping[user_id]
+        indptr = self.interactions.indptr
+        return self.interactions.indices[indptr[user_idx] : indptr[user_idx + 1]]
+
     def _user_history(self, user_id: str) -> List[str]:
         """
         Retrieve items a user has interacted with.
@@ -53,55 +139,53 @@ class HybridRecommender:
         EN: Uses the interactions matrix if available.
         FA: در صورت وجود ماتریس تعاملات، اقلام تعامل‌شده کاربر را برمی‌گرداند.
         """
-        if self.interactions is None:
-            return []
-        if user_id not in self.user_mapping:
-            return []
-        user_idx = self.user_mapping[user_id]
-        item_indices = self.interactions[user_idx].indices
-        inverse_item_map = {idx: iid for iid, idx in self.item_mapping.items()}
-        return [inverse_item_map[i] for i in item_indices if i in inverse_item_map]
+        inverse_item_map = self._inverse_item_mapping
+        return [
+            inverse_item_map[i]
+            for i in self._user_history_indices(user_id).tolist()
+            if i in inverse_item_map
+        ]
 
     def _content_scores_for_candidates(
-        self, seed_items: Sequence[str], candidates: Sequence[str]
-    ) -> Dict[str, float]:
+        self, seed_indices: np.ndarray, candidate_indices: np.ndarray
+    ) -> np.ndarray:
         """
         Compute content-based scores for candidate items given seed items.
 
-        EN: Uses max similarity to any seed as content score.
-        FA: بیشینه شباهت هر نامزد به اقلام مبنا را به‌عنوان امتیاز محتوایی می‌گیرد.
+        EN: Uses max similarity to any seed as content score; inputs are item indices and the
+            result is aligned with `candidate_indices`.
+        FA: بیشینه شباهت هر نامزد به اقلام مبنا را به‌عنوان امتیاز محتوایی می‌گیرد؛ ورودی‌ها اندیس کالا
+            هستند و خروجی هم‌تراز با `candidate_indices` است.
         """
-        if not seed_items:
-            return {cid: 0.0 for cid in candidates}
-
-        # EN: Build matrices for seeds and candidates
-        # FA: ماتریس اقلام مبنا و نامزد را می‌سازیم
+        # EN: Candidates without features (or without seeds) keep a zero score
+        # FA: نامزدهای بدون ویژگی (یا بدون اقلام مبنا) امتیاز صفر می‌گیرند
+        content_scores = np.zeros(len(candidate_indices), dtype=np.float64)
         item_features = self.model_content.item_features
-        if item_features is None:
-            return {cid: 0.0 for cid in candidates}
-
-        idx_map = self.model_content.item_index
-        seed_idx = [idx_map[s] for s in seed_items if s in idx_map]
-        candidate_pairs = [(c, idx_map[c]) for c in candidates if c in idx_map]
-        if not seed_idx or not candidate_pairs:
-            return {cid: 0.0 for cid in candidates}
-
-        seed_matrix = item_features[seed_idx]
-        cand_matrix = item_features[[idx for _, idx in candidate_pairs]]
+        if item_features is None or len(seed_indices) == 0:
+            return content_scores
+
+        # EN: Translate item indices to content feature rows
+        # FA: اندیس کالاها به سطرهای ویژگی محتوایی ترجمه می‌شود
+        content_rows = self._content_rows
+        if len(content_rows) == 0:
+            return content_scores
+        seed_rows = content_rows[seed_indices[seed_indices < len(content_rows)]]
+        seed_rows = seed_rows[seed_rows >= 0]
+        # EN/FA: اندیس ۱- یعنی نامزد بدون نگاشت
+        cand_rows = np.where(candidate_indices >= 0, content_rows[candidate_indices], -1)
+        candidate_pos = np.flatnonzero(cand_rows >= 0)
+        if len(seed_rows) == 0 or len(candidate_pos) == 0:
+            return content_scores
+
+        seed_matrix = item_features[seed_rows]
+        cand_matrix = item_features[cand_rows[candidate_pos]]
 
         # EN: Cosine similarity via matrix multiplication
         # FA: شباهت کسینوسی با ضرب ماتریس‌ها
         sims = cand_matrix @ seed_matrix.T  # shape: (candidates, seeds)
-        # EN: Convert to dense array to safely take row-wise maxima
-        # FA: برای گرفتن ماکسیمم ردیفی، به آرایه چگال تبدیل می‌کنیم
-        sims_array = sims.toarray()
-        max_sims = sims_array.max(axis=1)
-
-        content_scores = {candidate_pairs[i][0]: float(max_sims[i]) for i in range(len(candidate_pairs))}
-        # EN: Fill missing candidates with zero
-        # FA: برای نامزدهای بدون شباهت، صفر می‌گذاریم
-        for cid in candidates:
-            content_scores.setdefault(cid, 0.0)
+        # EN: Sparse-aware row maxima; implicit zeros count, exactly as in the dense product
+        # FA: بیشینه سطری با آگاهی از تنکی؛ صفرهای ضمنی مانند حاصل‌ضرب چگال لحاظ می‌شوند
+        content_scores[candidate_pos] = sims.max(axis=1).toarray().ravel()
         return content_scores
 
     def _fallback_content(self, top_k: int, seed_items: Sequence[str]) -> List[Tuple[str, float]]:
@@ -117,6 +201,37 @@ class HybridRecommender:
             return self.model_content.similar_items(seed_items[0], top_k=top_k)
         return self.model_content.top_items_by_norm(top_k=top_k)
 
+    def _blend(self, user_id: str, cf_recs: Recommendations, top_k: int) -> List[Tuple[str, float]]:
+        """
+        Blend one user's CF candidates with content scores and rank them.
+
+        EN: Shared by the single-user and batch paths; falls back to content when nothing survives filtering.
+        FA: بین مسیر تک‌کاربره و دسته‌ای مشترک است؛ اگر پس از فیلتر چیزی نماند به محتوایی سقوط می‌کند.
+        """
+        # EN: Determine user history (raw indices) for filtering/content weighting
+        # FA: سابقه کاربر (اندیس‌های خام) را برای فیلتر و وزن‌دهی محتوایی استخراج می‌کنیم
+        history = self._user_history_indices(user_id)
+        candidate_indices = self._candidate_indices(cf_recs)
+        content_scores = self._content_scores_for_candidates(history, candidate_indices)
+
+        # EN: Blend the two score arrays in one vectorized step
+        # FA: دو آرایه امتیاز در یک گام برداری ترکیب می‌شوند
+        final = self.alpha * cf_recs.scores.astype(np.float64) + (1 - self.alpha) * content_scores
+
+        # EN: Optionally filter already seen items with a boolean mask over indices
+        # FA: در صورت نیاز اقلام دیده‌شده با یک ماسک بولی روی اندیس‌ها حذف می‌شوند
+        keep = np.ones(len(candidate_indices), dtype=bool)
+        if self.filter_seen and len(history):
+            keep = ~np.isin(candidate_indices, history)
+        if not keep.any():
+            return self._fallback_content(top_k, self._user_history(user_id))
+
+        # EN: Stable descending sort keeps CF order among ties, then truncate
+        # FA: مرتب‌سازی نزولی پایدار ترتیب CF را در امتیازهای برابر حفظ کرده و سپس برش می‌دهد
+        kept = np.flatnonzero(keep)
+        order = kept[np.argsort(-final[kept], kind="stable")[:top_k]]
+        return Recommendations(cf_recs.item_ids[order], final[order]).to_list()
+
     def recommend_for_user(self, user_id: str, top_k: int = 10) -> List[Tuple[str, float]]:
         """
         Recommend items for a user using hybrid scoring.
@@ -124,39 +239,40 @@ class HybridRecommender:
         EN: Blends CF scores with content similarity, optionally filtering seen items.
         FA: امتیاز ترکیبی CF و شباهت محتوایی را اعمال کرده و در صورت نیاز اقلام دیده‌شده را حذف می‌کند.
         """
-        # EN: Determine user history for filtering/content weighting
-        # FA: سابقه کاربر را برای فیلتر و وزن‌دهی محتوایی استخراج می‌کنیم
-        seen_items = set(self._user_history(user_id))
-
         try:
-            cf_recs = self.model_cf.recommend(
+            cf_recs = self.model_cf.recommend_arrays(
                 user_id, top_k=top_k * 3, exclude_interacted=self.filter_seen
             )
         except ValueError:
             # EN: CF unavailable for this user, fallback to content
             # FA: در صورت ناموجود بودن CF برای کاربر، به محتوایی سقوط می‌کنیم
-            return self._fallback_content(top_k, list(seen_items))
-
-        candidate_ids = [iid for iid, _ in cf_recs]
-        content_scores = self._content_scores_for_candidates(seen_items, candidate_ids)
-
-        hybrid_scores: List[Tuple[str, float]] = []
-        for iid, cf_score in cf_recs:
-            cont_score = content_scores.get(iid, 0.0)
-            final_score = self.alpha * cf_score + (1 - self.alpha) * cont_score
-            hybrid_scores.append((iid, final_score))
-
-        # EN: Optionally filter already seen items
-        # FA: در صورت نیاز اقلام دیده‌شده حذف می‌شوند
-        if self.filter_seen and seen_items:
-            hybrid_scores = [(iid, sc) for iid, sc in hybrid_scores if iid not in seen_items]
-
-        # EN: Sort and truncate
-        # FA: مرتب‌سازی و برش به K مورد
-        hybrid_scores.sort(key=lambda x: x[1], reverse=True)
-        if not hybrid_scores:
-            return self._fallback_content(top_k, list(seen_items))
-        return hybrid_scores[:top_k]
+            return self._fallback_content(top_k, self._user_history(user_id))
+        return self._blend(user_id, cf_recs, top_k)
+
+    def recommend_batch(self, user_ids: Sequence[str], top_k: int = 10) -> List[List[Tuple[str, float]]]:
+        """
+        Recommend items for many users using hybrid scoring.
+
+        EN: CF candidates for all known users come from one batched GEMM; unknown users use the content fallback.
+        FA: نامزدهای CF همه کاربران شناخته‌شده از یک ضرب ماتریسی دسته‌ای می‌آیند؛ کاربران ناشناخته از جایگزین محتوایی استفاده می‌کنند.
+        """
+        cf_users = self.model_cf.user_mapping
+        known = [uid for uid in user_ids if uid in cf_users]
+        cf_batch = self.model_cf.recommend_batch_arrays(
+            known, top_k=top_k * 3, exclude_interacted=self.filter_seen
+        )
+        cf_by_user = dict(zip(known, cf_batch))
+
+        results: List[List[Tuple[str, float]]] = []
+        for uid in user_ids:
+            cf_recs = cf_by_user.get(uid)
+            if cf_recs is None:
+                # EN: CF unavailable for this user, fallback to content
+                # FA: در صورت ناموجود بودن CF برای کاربر، به محتوایی سقوط می‌کنیم
+                results.append(self._fallback_content(top_k, self._user_history(uid)))
+            else:
+                results.append(self._blend(uid, cf_recs, top_k))
+        return results
 
     def similar_items(self, item_id: str, top_k: int = 10) -> List[Tuple[str, float]]:
         """
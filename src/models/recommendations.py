@@ -0,0 +1,37 @@
+"""
+Array-backed recommendation results shared by the models.
+
+EN: Keeps item IDs and scores in two parallel arrays instead of a list of (id, score) tuples.
+FA: شناسه کالاها و امتیازها را به‌جای فهرستی از تاپل‌های (شناسه، امتیاز) در دو آرایه موازی نگه می‌دارد.
+"""
+
+from __future__ import annotations
+
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class Recommendations(NamedTuple):
+    """
+    Ranked recommendations in structure-of-arrays form.
+
+    EN: `item_ids[i]` has score `scores[i]`; rows are ordered best first. `item_indices` optionally
+        carries the producing model's item indices so callers need not map IDs back.
+    FA: `item_ids[i]` امتیاز `scores[i]` را دارد؛ ردیف‌ها از بهترین مرتب شده‌اند. `item_indices` در صورت
+        وجود اندیس کالاها در مدل تولیدکننده را نگه می‌دارد تا فراخواننده نیازی به نگاشت معکوس نداشته باشد.
+    """
+
+    item_ids: np.ndarray
+    scores: np.ndarray
+    item_indices: Optional[np.ndarray] = None
+
+    def to_list(self) -> List[Tuple[str, float]]:
+        """
+        EN: Convert to the public list-of-tuples format returned by the API.
+        FA: تبدیل به قالب عمومی فهرست تاپل‌ها که API برمی‌گرداند.
+        """
+        return list(zip(self.item_ids.tolist(), self.scores.tolist()))
+
+
+__all__ = ["Recommendations"]
@@ -1,9 +1,13 @@
 """Utility helpers for file system and serialization operations."""
 
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+import os
 import pickle
 
+import numpy as np
+import orjson
+
 
 def ensure_dir(path: Union[str, Path]) -> None:
     """
@@ -18,33 +22,130 @@ def ensure_dir(path: Union[str, Path]) -> None:
     dir_path.mkdir(parents=True, exist_ok=True)
 
 
-def save_pickle(obj: Any, path: Union[str, Path]) -> None:
+def save_pickle(
+    obj: Any,
+    path: Union[str, Path],
+    buffer_callback: Optional[Callable[[pickle.PickleBuffer], Any]] = None,
+) -> None:
     """
     Save a Python object to disk using pickle.
 
-    EN: Serializes an object to a binary file.
-    FA: یک شیٔ پایتونی را به صورت باینری روی دیسک ذخیره می‌کند.
+    EN: Serializes with protocol 5 via a temp file + rename so readers never see a partial file;
+        pass `buffer_callback` to keep large array buffers out-of-band (see `load_pickle(buffers=...)`).
+    FA: با پروتکل ۵ و از طریق فایل موقت + تغییر نام ذخیره می‌کند تا خواننده‌ها فایل ناقص نبینند؛
+        با `buffer_callback` بافرهای بزرگ آرایه‌ها خارج از باند نگه داشته می‌شوند (ر.ک. `load_pickle(buffers=...)`).
     """
     file_path = Path(path)
     # EN: Ensure parent directory exists before writing the pickle
     # FA: قبل از نوشتن فایل پیکل، پوشه والد را ایجاد/بررسی می‌کنیم
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    with file_path.open("wb") as f:
-        pickle.dump(obj, f)
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+    with tmp_path.open("wb") as f:
+        pickle.dump(obj, f, protocol=5, buffer_callback=buffer_callback)
+    os.replace(tmp_path, file_path)
 
 
-def load_pickle(path: Union[str, Path]) -> Any:
+def load_pickle(path: Union[str, Path], buffers: Optional[Iterable[Any]] = None) -> Any:
     """
     Load a Python object from a pickle file.
 
-    EN: Deserializes an object from disk.
-    FA: شیٔ ذخیره شده را از فایل پیکل بازیابی می‌کند.
+    EN: Deserializes an object from disk; `buffers` supplies out-of-band data saved via `buffer_callback`.
+    FA: شیٔ ذخیره شده را از فایل پیکل بازیابی می‌کند؛ `buffers` داده‌های خارج از باند ذخیره‌شده با `buffer_callback` را فراهم می‌کند.
     """
     file_path = Path(path)
     # EN: Open the binary file and load the object
     # FA: فایل باینری را باز کرده و شیٔ را بارگذاری می‌کنیم
     with file_path.open("rb") as f:
-        return pickle.load(f)
+        return pickle.load(f, buffers=buffers)
+
+
+class _MappingUnpickler(pickle.Unpickler):
+    """
+    EN: Unpickler for legacy ID mappings; only builtins and NumPy scalar reconstruction are allowed.
+    FA: آن‌پیکلر برای نگاشت‌های قدیمی شناسه؛ فقط انواع پایه و بازسازی اسکالر NumPy مجاز است.
+    """
+
+    _ALLOWED = {
+        ("numpy", "dtype"),
+        ("numpy.core.multiarray", "scalar"),
+        ("numpy._core.multiarray", "scalar"),
+    }
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in self._ALLOWED:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"Refusing to load global {module}.{name} from a mapping pickle")
+
+
+def load_mapping_pickle(path: Union[str, Path]) -> Dict[str, int]:
+    """
+    Load a pickled ID->index mapping with a restricted unpickler.
+
+    EN: Plain `pickle` (no pandas machinery), refusing arbitrary globals since mappings are plain dicts.
+    FA: `pickle` ساده (بدون سازوکار pandas) که چون نگاشت‌ها دیکشنری ساده‌اند، global دلخواه را نمی‌پذیرد.
+    """
+    with Path(path).open("rb") as f:
+        return _MappingUnpickler(f).load()
+
+
+def save_json(obj: Any, path: Union[str, Path]) -> None:
+    """
+    Save a JSON-friendly object (e.g. Dict[str, int] mappings) with orjson.
+
+    EN: Faster and safer than pickle for plain dicts; NumPy scalars/arrays are serialized natively.
+    FA: برای دیکشنری‌های ساده سریع‌تر و امن‌تر از pickle است؛ اسکالر/آرایه‌های NumPy مستقیماً سریال می‌شوند.
+    """
+    file_path = Path(path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_bytes(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY))
+
+
+def load_json(path: Union[str, Path]) -> Any:
+    """
+    Load an object saved with `save_json`.
+
+    EN: Parses the raw bytes with orjson.
+    FA: بایت‌های خام را با orjson تجزیه می‌کند.
+    """
+    return orjson.loads(Path(path).read_bytes())
+
+
+def save_id_array(ids: Iterable[str], path: Union[str, Path]) -> None:
+    """
+    Save an ID list as a fixed-width string .npy array (index = code).
+
+    EN: Stores the code->ID table without pickle so it can be memory-mapped on load.
+    FA: جدول کد به شناسه را بدون pickle ذخیره می‌کند تا هنگام بارگذاری قابل نگاشت حافظه باشد.
+    """
+    file_path = Path(path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(file_path, np.asarray(list(ids), dtype=np.str_), allow_pickle=False)
+
+
+def load_id_mapping(processed_dir: Union[str, Path], name: str) -> Dict[str, int]:
+    """
+    Load an ID->index mapping saved by preprocessing.
+
+    EN: Prefers `<name>_ids.npy` and falls back to the legacy `<name>_mapping.pkl`.
+    FA: ابتدا `<name>_ids.npy` و در صورت نبود، فایل قدیمی `<name>_mapping.pkl` را می‌خواند.
+    """
+    processed = Path(processed_dir)
+    ids_path = processed / f"{name}_ids.npy"
+    if not ids_path.exists():
+        return load_mapping_pickle(processed / f"{name}_mapping.pkl")
+    # EN: The array index is the code; build the reverse dict in one pass
+    # FA: اندیس آرایه همان کد است؛ دیکشنری معکوس در یک گذر ساخته می‌شود
+    ids = np.load(ids_path, mmap_mode="r", allow_pickle=False)
+    return dict(zip(ids.tolist(), range(len(ids))))
 
 
-__all__ = ["ensure_dir", "save_pickle", "load_pickle"]
+__all__ = [
+    "ensure_dir",
+    "save_pickle",
+    "load_pickle",
+    "load_mapping_pickle",
+    "save_json",
+    "load_json",
+    "save_id_array",
+    "load_id_mapping",
+]
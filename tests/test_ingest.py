@@ -0,0 +1,47 @@
+"""
+Ingestion tests for raw item properties.
+
+EN: Verifies that blank identifiers are treated as missing, as the pandas reader did.
+FA: بررسی می‌کند که شناسه‌های خالی مانند خواننده پانداس مفقود در نظر گرفته شوند.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+from src.data.ingest import load_raw_item_properties, write_item_properties_parquet
+
+RAW_ITEM_PROPERTIES = """timestamp,itemid,property,value
+1435460400000,1,categoryid,1338
+1435460400000,,888,1116713 960601
+1435460400000,2,available,
+"""
+
+
+def _write_raw_parts(dataset_dir: Path) -> None:
+    (dataset_dir / "item_properties_part1.csv").write_text(RAW_ITEM_PROPERTIES, encoding="utf-8")
+
+
+def test_blank_item_properties_fields_read_as_missing(tmp_path):
+    """
+    EN: Empty CSV fields must load as missing values, not empty strings.
+    FA: فیلدهای خالی CSV باید به صورت مقدار مفقود خوانده شوند، نه رشته خالی.
+    """
+    _write_raw_parts(tmp_path)
+    df = load_raw_item_properties(tmp_path)
+    assert df["itemid"].isna().tolist() == [False, True, False]
+    assert df["value"].isna().tolist() == [False, False, True]
+    assert len(df.dropna(subset=["itemid"])) == 2
+
+
+def test_streamed_item_properties_drop_blank_item_ids(tmp_path):
+    """
+    EN: The streaming Parquet writer must drop rows whose itemid field is blank.
+    FA: نویسنده جریانی Parquet باید ردیف‌هایی با فیلد itemid خالی را حذف کند.
+    """
+    _write_raw_parts(tmp_path)
+    out_path = tmp_path / "item_properties_clean.parquet"
+    assert write_item_properties_parquet(tmp_path, out_path) == 2
+    assert pq.read_table(out_path, columns=["itemid"])["itemid"].to_pylist() == ["1", "2"]
@@ -7,46 +7,36 @@ FA: صحت سلامت، توصیه، اقلام مشابه و مدیریت خط
 
 from __future__ import annotations
 
-from pathlib import Path
+import logging
+import queue
 
 import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
 
-from service.main import app
+from service.main import BatchingQueueListener, app
 
 
-def _sample_user_and_item() -> tuple[str, str]:
+@pytest.fixture(scope="session")
+def api_client():
     """
-    EN: Read processed data to pick a known user and item for tests.
-    FA: برای تست، یک کاربر و کالا از داده‌های پردازش‌شده برمی‌دارد.
+    EN: Use TestClient context to ensure startup events run; one startup (model load) per session.
+    FA: از TestClient با کانتکست استفاده می‌کنیم تا رویداد startup اجرا شود؛ یک‌بار بارگذاری مدل در هر نشست.
     """
-    project_root = Path(__file__).resolve().parents[1]
-    processed = project_root / "data" / "processed"
-    user_map_path = processed / "user_mapping.pkl"
-    item_map_path = processed / "item_mapping.pkl"
-    if not (user_map_path.exists() and item_map_path.exists()):
-        raise RuntimeError("Mappings not found; run preprocessing first.")
-    user_map = pd.read_pickle(user_map_path)
-    item_map = pd.read_pickle(item_map_path)
-    # EN: pick first user/item in mapping to ensure they exist in model factors
-    # FA: اولین کاربر/کالا در نگاشت انتخاب می‌شود تا در مدل وجود داشته باشد
-    sample_user = next(iter(user_map.keys()))
-    sample_item = next(iter(item_map.keys()))
-    return str(sample_user), str(sample_item)
-
-
-SAMPLE_USER, SAMPLE_ITEM = _sample_user_and_item()
+    with TestClient(app) as c:
+        yield c
 
 
-@pytest.fixture(scope="module")
-def api_client():
+@pytest.fixture(scope="session")
+def sample_ids(api_client) -> tuple[str, str]:
     """
-    EN: Use TestClient context to ensure startup events run.
-    FA: از TestClient با کانتکست استفاده می‌کنیم تا رویداد startup اجرا شود.
+    EN: Pick a known user and item from the mappings the service already loaded at startup.
+    FA: یک کاربر و کالای شناخته‌شده از نگاشت‌هایی که سرویس هنگام startup بارگذاری کرده انتخاب می‌شود.
     """
-    with TestClient(app) as c:
-        yield c
+    registry = app.state.registry
+    # EN: pick first user/item in mapping to ensure they exist in model factors
+    # FA: اولین کاربر/کالا در نگاشت انتخاب می‌شود تا در مدل وجود داشته باشد
+    return str(next(iter(registry.user_mapping))), str(next(iter(registry.item_mapping)))
 
 
 def test_health_endpoint_works(api_client):
@@ -60,34 +50,103 @@ def test_health_endpoint_works(api_client):
     assert data["status"] == "ok"
 
 
-def test_recommendations_returns_items_for_known_user(api_client):
+def test_recommendations_returns_items_for_known_user(api_client, sample_ids):
     """
     EN: Recommendations should return items for a known user.
     FA: برای کاربر شناخته‌شده باید اقلامی برگردد.
     """
-    resp = api_client.post("/recommendations", json={"user_id": SAMPLE_USER, "top_k": 5, "model": "hybrid"})
+    sample_user, _ = sample_ids
+    resp = api_client.post("/recommendations", json={"user_id": sample_user, "top_k": 5, "model": "hybrid"})
     assert resp.status_code == 200
     data = resp.json()
-    assert data["user_id"] == SAMPLE_USER
+    assert data["user_id"] == sample_user
     assert len(data["items"]) > 0
 
 
-def test_similar_items_returns_items_for_known_item(api_client):
+def test_similar_items_returns_items_for_known_item(api_client, sample_ids):
     """
     EN: Similar-items endpoint should return items for a known item.
     FA: اندپوینت اقلام مشابه باید برای کالای شناخته‌شده خروجی دهد.
     """
-    resp = api_client.post("/similar-items", json={"item_id": SAMPLE_ITEM, "top_k": 5})
+    _, sample_item = sample_ids
+    resp = api_client.post("/similar-items", json={"item_id": sample_item, "top_k": 5})
     assert resp.status_code == 200
     data = resp.json()
-    assert data["item_id"] == SAMPLE_ITEM
+    assert data["item_id"] == sample_item
     assert len(data["items"]) > 0
 
 
-def test_invalid_model_returns_400(api_client):
+def test_invalid_model_returns_400(api_client, sample_ids):
     """
     EN: Invalid model names should yield HTTP 400.
     FA: نام مدل نامعتبر باید خطای ۴۰۰ ایجاد کند.
     """
-    resp = api_client.post("/recommendations", json={"user_id": SAMPLE_USER, "top_k": 5, "model": "unknown"})
+    sample_user, _ = sample_ids
+    resp = api_client.post("/recommendations", json={"user_id": sample_user, "top_k": 5, "model": "unknown"})
     assert resp.status_code == 400
+
+
+def test_item_metadata_cache_does_not_leak_scores(api_client, sample_ids):
+    """
+    EN: Cached metadata must not carry scores from earlier responses.
+    FA: فراداده کش‌شده نباید امتیاز پاسخ‌های قبلی را نگه دارد.
+    """
+    _, sample_item = sample_ids
+    resp = api_client.post("/similar-items", json={"item_id": sample_item, "top_k": 5})
+    assert resp.status_code == 200
+    first_item = resp.json()["items"][0]
+    assert first_item["score"] is not None
+
+    item_resp = api_client.get(f"/items/{first_item['item_id']}")
+    assert item_resp.status_code == 200
+    assert item_resp.json()["score"] is None
+
+
+def test_items_with_blank_property_values_serialize(api_client, sample_ids, monkeypatch):
+    """
+    EN: Items whose property value is null (blank in the raw CSV) must still produce valid responses.
+    FA: اقلامی که مقدار ویژگی آن‌ها null است (خالی در CSV خام) باید همچنان پاسخ معتبر تولید کنند.
+    """
+    _, sample_item = sample_ids
+    resp = api_client.post("/similar-items", json={"item_id": sample_item, "top_k": 5})
+    item_ids = [item["item_id"] for item in resp.json()["items"]]
+
+    registry = app.state.registry
+    blank_props = pd.DataFrame(
+        {
+            "itemid": item_ids * 2,
+            "property": ["categoryid"] * len(item_ids) + ["color"] * len(item_ids),
+            "value": [None] * (2 * len(item_ids)),
+        }
+    ).convert_dtypes(dtype_backend="pyarrow")
+    monkeypatch.setattr(registry, "_item_meta", registry._build_item_meta_index(blank_props))
+    registry._cached_item_metadata.cache_clear()
+    try:
+        resp = api_client.post("/similar-items", json={"item_id": sample_item, "top_k": 5})
+        assert resp.status_code == 200
+        assert resp.json()["items"][0]["category"] == "nan"
+        assert api_client.get(f"/items/{item_ids[0]}").status_code == 200
+    finally:
+        registry._cached_item_metadata.cache_clear()
+
+
+def test_log_listener_restarts_and_stops_idempotently():
+    """
+    EN: The log writer must survive stop/start cycles (one per app startup) and repeated stops.
+    FA: نویسنده لاگ باید چرخه‌های stop/start (یکی برای هر راه‌اندازی برنامه) و توقف‌های مکرر را تحمل کند.
+    """
+    records: queue.SimpleQueue = queue.SimpleQueue()
+
+    class CollectingHandler(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            records.put(record.getMessage())
+
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    listener = BatchingQueueListener(q, CollectingHandler())
+    for message in ("first", "second"):
+        listener.start()
+        listener.start()
+        q.put(logging.makeLogRecord({"msg": message}))
+        listener.stop()
+        listener.stop()
+    assert [records.get_nowait() for _ in range(records.qsize())] == ["first", "second"]